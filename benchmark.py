@@ -0,0 +1,334 @@
+"""Benchmarks convertja.py against synthetic Json Assets packs.
+
+Generates packs of N objects, crops, fruit trees, weapons & big craftables, times
+each build* step separately, then checks the optimized pipeline still writes the
+same content json, i18n & spritesheets as a plain serial run. A small fixed pack is
+also converted & compared against the output committed in GOLDENFILE, so changes
+to what the converter writes are caught as well.
+
+python benchmark.py --sizes=100,1000,10000 --baseline=benchmark_baseline.json
+python benchmark.py --sizes=100 --update-golden  # after an intended output change
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import tempfile
+import time
+
+from PIL import Image
+
+import convertja
+from classes import BigObject, Buff, Crop, FruitTree, MeleeWeapon, SVObject
+from vanillaindex import NAMERE, loadVanillaIndex
+
+GOLDENFILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "benchmark_golden.json")  # committed output of the GOLDENSIZE pack
+GOLDENSIZE = 10  # items per type in the pack checked against GOLDENFILE
+CATEGORIES = ["Vegetable", "Fruit", "Cooking", "Crafting", "ArtisanGoods", "Flower", -79, "-75"]
+LANGUAGES = ["de", "es", "fr", "ja", "pt", "ru", "zh"]
+NPCS = convertja.VANILLANPCS + ["Amanra", "Astrid", "Marlon", "Olivia"]
+PLAINOPTIONS = {"jobs": 1, "spriteCache": False, "dedupe": False, "pngProfile": "default",  # options of the reference runs
+                "compactJson": False, "rebuild": True}
+REGRESSION = 1.2  # a step slower than this multiple of the baseline is flagged
+STEPS = ["buildObjects", "buildCrops", "buildTrees", "buildWeapons", "buildBigObjects",
+         "buildCooking", "buildCrafting", "buildSprites", "writeData", "serialize"]
+VANILLAFILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "vanillaObjects.json")
+
+
+def checkGolden(workDir, update=False):
+    """Converts the GOLDENSIZE pack plainly & compares it with GOLDENFILE, update rewrites GOLDENFILE instead."""
+    srcDir = os.path.join(workDir, "pack", "")
+    outDir = os.path.join(workDir, "output", "")
+    makePack(srcDir, GOLDENSIZE)
+    convertja.applyOptions(PLAINOPTIONS)
+    convertja.DOCS = convertja.DocumentStore(1)
+    runStages(srcDir, outDir, loadVanillaIndex(VANILLAFILE))
+    snapshot = snapshotOutput(outDir)
+    diffs = checkLocalizations(srcDir, outDir)
+    if update:
+        with open(GOLDENFILE, 'w', encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=1, sort_keys=True)
+        print("Golden output written to {}".format(GOLDENFILE))
+        return diffs
+    with open(GOLDENFILE, encoding="utf-8") as f:
+        golden = json.load(f)
+    return diffs + compareSnapshots(golden, snapshot)
+
+
+def checkLocalizations(srcDir, outDir):
+    """Returns the NameLocalization & DescriptionLocalization strings of the pack missing from their i18n/<lang>.json."""
+    expected = {}
+    for folder, fields in [("Objects", ["Name", "Description"]), ("BigCraftables", ["Name", "Description"]),
+                           ("Crops", ["SeedName", "SeedDescription"]), ("FruitTrees", ["SaplingName", "SaplingDescription"])]:
+        for path in glob.glob(os.path.join(glob.escape(srcDir), folder, "*", "*.json")):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            nameStr = re.sub(NAMERE, "", data[fields[0]])
+            for field, suffix in zip(fields, ["DisplayName", "Description"]):
+                for lang, text in data.get("{}Localization".format(field), {}).items():
+                    expected.setdefault(lang, {})["{}.{}".format(nameStr, suffix)] = text
+    missing = []
+    for lang, strings in sorted(expected.items()):
+        langPath = "{}i18n/{}.json".format(outDir, lang)
+        if not os.path.exists(langPath):
+            missing.append("i18n/{}.json".format(lang))
+            continue
+        with open(langPath, encoding="utf-8") as f:
+            written = json.load(f)
+        # a key under another case or spelling than the English text is never looked up
+        missing += ["i18n/{}.json {}".format(lang, k) for k, v in strings.items() if written.get(k) != v]
+    unexpected = set(os.listdir("{}i18n".format(outDir))) - {"default.json"} - {"{}.json".format(lang) for lang in expected}
+    return missing + ["i18n/{} unexpected".format(name) for name in sorted(unexpected)]
+
+
+def compareBaseline(results, baseline):
+    """Prints each step's time against the baseline, returns the steps that regressed."""
+    regressions = []
+    for size, steps in results["Sizes"].items():
+        if size not in baseline["Sizes"]:
+            continue
+        for step, seconds in steps.items():
+            before = baseline["Sizes"][size].get(step)
+            if not before:
+                continue
+            ratio = seconds / before
+            flag = ""
+            if ratio > REGRESSION:
+                flag = " REGRESSION"
+                regressions.append("{} @ {}".format(step, size))
+            print("{:>6} {:<16} {:8.3f}s  baseline {:8.3f}s  x{:.2f}{}".format(size, step, seconds, before, ratio, flag))
+    return regressions
+
+
+def compareOutput(refDir, optDir):
+    """Returns the data, i18n & texture files that differ between two output folders."""
+    return compareSnapshots(snapshotOutput(refDir), snapshotOutput(optDir))
+
+
+def compareSnapshots(refSnapshot, optSnapshot):
+    """Returns the files missing from, extra in or different between two snapshotOutput()s."""
+    return [name for name in sorted(set(refSnapshot) | set(optSnapshot)) if refSnapshot.get(name) != optSnapshot.get(name)]
+
+
+def goldenCheck(srcDir, workDir, jobs):
+    """Runs every stage plainly, then with the pool, manifest & sprite cache, and compares the output."""
+    vanillaIndex = loadVanillaIndex(VANILLAFILE)
+    refDir = os.path.join(workDir, "reference", "")
+    optDir = os.path.join(workDir, "optimized", "")
+    convertja.applyOptions(PLAINOPTIONS)
+    runStages(srcDir, refDir, vanillaIndex)
+    convertja.applyOptions(dict(PLAINOPTIONS, jobs=jobs, spriteCache=True, pngProfile="fast"))
+    convertja.SPRITECACHE.cacheDir = os.path.join(workDir, "spritecache")
+    convertja.SPRITECACHE.entries = None
+    for run in range(2):  # the second run exercises the manifest & sprite cache
+        convertja.DOCS = convertja.DocumentStore(jobs)
+        convertja.MANIFEST.open(optDir, VANILLAFILE)
+        runStages(srcDir, optDir, vanillaIndex)
+        convertja.MANIFEST.save()
+        convertja.SPRITECACHE.save()
+    convertja.MANIFEST = convertja.Manifest()
+    return compareOutput(refDir, optDir)
+
+
+def makeImage(path, size, rng):
+    """Writes a random solid sprite, with a few shared colours so dedupe has work to do."""
+    color = (rng.randrange(0, 256, 32), rng.randrange(0, 256, 32), rng.randrange(0, 256, 32), 255)
+    Image.new("RGBA", size, color).save(path)
+
+
+def makePack(root, count, seed=0):
+    """Generates a Json Assets pack with count of each item type under root."""
+    rng = random.Random(seed)
+    for folder in ["Objects", "Crops", "FruitTrees", "Weapons", "BigCraftables"]:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+    with open(os.path.join(root, "manifest.json"), 'w') as f:
+        json.dump({"Name": "Benchmark Pack", "UniqueID": "Benchmark.Pack{}".format(count),
+                   "ContentPackFor": {"UniqueID": "spacechase0.JsonAssets"}}, f, indent=4)
+    for n in range(count):
+        name = "Bench Item {}".format(n)
+        objData = {"Name": name,
+                   "Description": "Benchmark item number {}.".format(n),
+                   "Category": CATEGORIES[n % len(CATEGORIES)],
+                   "Price": rng.randrange(10, 500),
+                   "Edibility": rng.choice([-300, 10, 25]),
+                   "ContextTags": ["color_green"],
+                   "GiftTastes": {"Love": rng.sample(NPCS, 2), "Like": rng.sample(NPCS, 3),
+                                  "Hate": rng.sample(NPCS, 1)},
+                   "NameLocalization": {lang: "{} ({})".format(name, lang) for lang in LANGUAGES},
+                   "DescriptionLocalization": {lang: "Item {} ({})".format(n, lang) for lang in LANGUAGES}}
+        if objData["Category"] in ["Cooking", "Crafting"]:
+            objData["Recipe"] = {"ResultCount": 1,
+                                 "Ingredients": [{"Object": "Parsnip", "Count": 1},
+                                                 {"Object": "Bench Item {}".format(rng.randrange(count)), "Count": 2},
+                                                 {"Object": 388, "Count": 5}]}
+        if n % 10 == 0:
+            objData["EdibleBuffs"] = {"Farming": 1, "Luck": 1, "Duration": 120}
+        writeItem(root, "Objects", name, "object", objData, rng, [("object", (16, 16))])
+        cropData = {"Name": "Bench Crop {}".format(n),
+                    "Product": name,
+                    "SeedName": "Bench Seeds {}".format(n),
+                    "SeedDescription": "Plant these in spring.",
+                    "Seasons": ["spring", "summer"],
+                    "Phases": [1, 2, 2, 3],
+                    "SeedPurchasePrice": 40,
+                    "RegrowthPhase": rng.choice([-1, 3]),
+                    "Bonus": {"MinimumPerHarvest": 1, "MaximumPerHarvest": 3,
+                              "MaxIncreasePerFarmLevel": 10, "ExtraChance": 0.1},
+                    "CropType": rng.choice(["Normal", "Paddy", "IndoorsOnly"])}
+        writeItem(root, "Crops", "Bench Crop {}".format(n), "crop", cropData, rng,
+                  [("crop", (128, 32)), ("seeds", (16, 16))])
+        treeData = {"Name": "Bench Tree {}".format(n),
+                    "Product": name,
+                    "SaplingName": "Bench Sapling {}".format(n),
+                    "SaplingDescription": "Grows into a tree.",
+                    "Season": rng.choice(["spring", "summer", "fall", "winter"]),
+                    "SaplingPurchasePrice": 1000}
+        writeItem(root, "FruitTrees", "Bench Tree {}".format(n), "tree", treeData, rng,
+                  [("tree", (432, 80)), ("sapling", (16, 16))])
+        weaponData = {"Name": "Bench Weapon {}".format(n),
+                      "Description": "Pointy.",
+                      "Type": rng.choice(["Sword", "Dagger", "Club"]),
+                      "MinimumDamage": 5, "MaximumDamage": 15, "Knockback": 1.5, "Speed": 2,
+                      "Accuracy": 0, "Defense": 1, "ExtraSwingArea": 0, "CritChance": 0.02,
+                      "CritMultiplier": 3, "MineDropVar": 20, "MineDropMinimumLevel": 40}
+        writeItem(root, "Weapons", "Bench Weapon {}".format(n), "weapon", weaponData, rng, [("weapon", (16, 16))])
+        machineData = {"Name": "Bench Machine {}".format(n),
+                       "Description": "Makes things.",
+                       "Price": 500,
+                       "ProvidesLight": n % 4 == 0,
+                       "Recipe": {"ResultCount": 1, "Ingredients": [{"Object": "Wood", "Count": 20}]},
+                       "NameLocalization": {"de": "Maschine {}".format(n)}}
+        writeItem(root, "BigCraftables", "Bench Machine {}".format(n), "big-craftable", machineData, rng,
+                  [("big-craftable", (16, 32))])
+
+
+def runStages(srcDir, dstDir, vanillaIndex):
+    """Runs all four conversion stages into dstDir & writes their merged i18n, as aio mode does."""
+    spriteDir = "{}textures/".format(dstDir)
+    os.makedirs(spriteDir, exist_ok=True)
+    results = [(stage, run(srcDir, dstDir, spriteDir, "{{ModId}}", vanillaIndex)) for stage, run in convertja.STAGES.items()]
+    convertja.writeLanguageData(convertja.mergeStageResults(results), dstDir)
+
+
+def snapshotOutput(outDir):
+    """Maps each data & i18n file in outDir to its json, & each spritesheet to its size & a hash of its pixels."""
+    snapshot = {}
+    for folder in ["data", "i18n"]:
+        for name in sorted(os.listdir("{}{}".format(outDir, folder))):
+            with open("{}{}/{}".format(outDir, folder, name), encoding="utf-8") as f:
+                snapshot["{}/{}".format(folder, name)] = json.load(f)
+    for name in sorted(os.listdir("{}textures".format(outDir))):
+        with Image.open("{}textures/{}".format(outDir, name)) as img:
+            pixels = img.convert("RGBA")
+            snapshot["textures/{}".format(name)] = [pixels.width, pixels.height, hashlib.sha1(pixels.tobytes()).hexdigest()]
+    return snapshot
+
+
+def timeSerializers(count):
+    """Times building & serializing count instances of every model class, the per-entry cost of each converter."""
+    start = time.perf_counter()
+    for i in range(count):
+        obj = SVObject(Name="Item{}".format(i), DisplayName="{{i18n:Item.Displayname}}", Price=i, Texture="Mods/x/Objects", SpriteIndex=i)
+        buff = Buff(Id="Item{}_buff".format(i), Duration=10, FarmingLevel=1)
+        obj.Buffs.append(buff.to_dict())
+        obj.to_dict()
+        BigObject(Name="Machine{}".format(i), Price=i, SpriteIndex=i).to_dict()
+        Crop(Seasons=["spring"], DaysInPhase=[1, 2, 3], HarvestItemID="Item{}".format(i), SpriteIndex=i).to_dict()
+        FruitTree(DisplayName="Tree", Seasons=["summer"], Fruit=[{"ItemId": "Item{}".format(i)}], TextureSpriteRow=i).to_dict()
+        MeleeWeapon(Name="Weapon{}".format(i), Type=0, SpriteIndex=i, MinDamage=1, MaxDamage=5, Speed=2).to_dict()
+    return time.perf_counter() - start
+
+
+def timeSteps(srcDir, workDir):
+    """Times each build* step & writeData on their own, every step parses its json from scratch."""
+    vanillaIndex = loadVanillaIndex(VANILLAFILE)
+    modId = "{{ModId}}"
+    timings = {}
+
+    def timed(step, func, *args):
+        convertja.DOCS = convertja.DocumentStore(convertja.DOCS.jobs)
+        start = time.perf_counter()
+        result = func(*args)
+        timings[step] = time.perf_counter() - start
+        return result
+
+    objectData, objectSprites, giftData, i18n, objTexture, cGifts = timed(
+        "buildObjects", convertja.buildObjects, srcDir, modId, "benchobjects", "Bench", {"en": {}})
+    cropObjects = {"Entries": {}}
+    timed("buildCrops", convertja.buildCrops, srcDir, modId, cropObjects, {}, {"en": {}}, "benchobjects", vanillaIndex)
+    timed("buildTrees", convertja.buildTrees, srcDir, modId, {"Entries": {}}, {}, {"en": {}}, "benchobjects", vanillaIndex)
+    timed("buildWeapons", convertja.buildWeapons, srcDir, modId, "benchweapons", {"en": {}})
+    timed("buildBigObjects", convertja.buildBigObjects, srcDir, modId, "benchmachines", "Bench", {"en": {}})
+    timed("buildCooking", convertja.buildCooking, srcDir, modId, vanillaIndex)
+    timed("buildCrafting", convertja.buildCrafting, srcDir, modId, vanillaIndex)
+    spriteDir = os.path.join(workDir, "textures", "")
+    os.makedirs(spriteDir, exist_ok=True)
+    timed("buildSprites", convertja.buildSprites, objectSprites, spriteDir, "benchobjects", "objects")
+    timed("writeData", convertja.writeData, [objTexture], [objectData, giftData], os.path.join(workDir, ""), "bench", cGifts)
+    timings["serialize"] = timeSerializers(len(objectData["Entries"]))
+    return timings
+
+
+def writeItem(root, folder, name, stem, data, rng, sprites):
+    """Writes one JA item folder: its json plus each (name, size) sprite."""
+    itemDir = os.path.join(root, folder, name)
+    os.makedirs(itemDir, exist_ok=True)
+    with open(os.path.join(itemDir, "{}.json".format(stem)), 'w', encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    for spriteName, size in sprites:
+        makeImage(os.path.join(itemDir, "{}.png".format(spriteName)), size, rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", dest="sizes", type=str, default="100,1000,10000", help="Comma separated pack sizes, items per type")
+    parser.add_argument("--jobs", dest="jobs", type=int, default=os.cpu_count() or 1, help="Worker processes used for json decoding")
+    parser.add_argument("--out", dest="outFile", type=str, default="benchmark_results.json", help="Where to write the results json")
+    parser.add_argument("--baseline", dest="baseline", type=str, help="Earlier results json to compare against")
+    parser.add_argument("--update-golden", dest="updateGolden", action="store_true", help="Rewrite the committed golden output after an intended change to what the converter writes")
+    parser.add_argument("--keep", dest="keep", action="store_true", help="Keep the generated packs & output")
+    args = parser.parse_args()
+    workRoot = tempfile.mkdtemp(prefix="ja2cp-bench-")
+    results = {"Python": platform.python_version(),
+               "Platform": platform.platform(),
+               "Jobs": args.jobs,
+               "Sizes": {},
+               "Golden": {}}
+    convertja.SPRITECACHE.enabled = False
+    try:
+        diffs = checkGolden(os.path.join(workRoot, "committed"), args.updateGolden)
+        results["Golden"]["Committed"] = diffs
+        print("Committed golden output check: {}".format("ok" if not diffs else ", ".join(diffs)))
+        for size in [int(n) for n in args.sizes.split(",")]:
+            packDir = os.path.join(workRoot, "pack{}".format(size), "")
+            print("Generating {} item pack".format(size))
+            makePack(packDir, size)
+            convertja.DOCS.jobs = args.jobs
+            results["Sizes"][str(size)] = timeSteps(packDir, os.path.join(workRoot, "steps{}".format(size)))
+            diffs = goldenCheck(packDir, os.path.join(workRoot, "golden{}".format(size)), args.jobs)
+            results["Golden"][str(size)] = diffs
+            print("Golden output check at {}: {}".format(size, "ok" if not diffs else ", ".join(diffs)))
+    finally:
+        if args.keep:
+            print("Packs kept in {}".format(workRoot))
+        else:
+            shutil.rmtree(workRoot, ignore_errors=True)
+    with open(args.outFile, 'w') as f:
+        json.dump(results, f, indent=4)
+    print("Results written to {}".format(args.outFile))
+    failed = [size for size, diffs in results["Golden"].items() if diffs]
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compareBaseline(results, json.load(f))
+    else:
+        for size, steps in results["Sizes"].items():
+            for step in STEPS:
+                print("{:>6} {:<16} {:8.3f}s".format(size, step, steps[step]))
+    if failed or regressions:
+        raise SystemExit(1)
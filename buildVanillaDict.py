@@ -1,20 +1,241 @@
 """Creates vanillaObjects.json from Decompiled Stardew Data.
 
-EDIT line 10 as needed.
+Usage: python buildVanillaDict.py --content "<Content (unpacked)>" [--out vanillaObjects.json] [--rebuild]
+
+Walks the unpacked Content folder for the Data assets in ASSETS, streams each one entry at a time and
+writes a single versioned file of ID/name/category tables. Assets whose size & mtime are unchanged since
+the last run are reused from the previous output instead of being parsed again.
 """
 
+import argparse
 import json
 import os
-import pprint
 
-VANILLAPATH = "H:/Stardew Decompiled/Content (unpacked)/Data/Objects.json"
+from jsonloader import JsonLoader
+from vanillaindex import DATAVERSION, loadVanillaIndex
+
+VANILLAPATH = "H:/Stardew Decompiled/Content (unpacked)"
+ASSETS = ["Objects", "BigCraftables", "Weapons", "Crops", "FruitTrees", "NPCGiftTastes"]
+CHUNKSIZE = 65536  # characters read per refill when streaming an asset
+GIFTTIERS = ["Love", "Like", "Dislike", "Hate", "Neutral"]  # order of the id lists in an NPC's gift taste string
+NUMBERCHARS = "0123456789+-.eE"  # characters that can continue a json number
+WHITESPACE = " \t\r\n"
+
+
+def extractBigCraftables(entries):
+    """ID to name table for Data/BigCraftables."""
+    return {itemId: {"Name": data["Name"]} for itemId, data in entries}
+
+
+def extractCrops(entries):
+    """Seed ID to harvest item ID table for Data/Crops."""
+    return {seedId: {"HarvestItemId": unqualify(data["HarvestItemId"])} for seedId, data in entries}
+
+
+def extractFruitTrees(entries):
+    """Sapling ID to fruit item IDs table for Data/FruitTrees."""
+    table = {}
+    for saplingId, data in entries:
+        table[saplingId] = {"Fruit": [unqualify(fruit["ItemId"]) for fruit in data.get("Fruit") or [] if fruit.get("ItemId")]}
+    return table
+
+
+def extractGiftTastes(entries):
+    """NPC to tier to item IDs table for Data/NPCGiftTastes, Universal_* keys map straight to their IDs."""
+    table = {}
+    for npc, tastes in entries:
+        if npc.startswith("Universal_"):
+            table[npc] = tastes.split()
+            continue
+        fields = tastes.split("/")
+        table[npc] = {}
+        for i, tier in enumerate(GIFTTIERS):
+            if 2 * i + 1 < len(fields):
+                table[npc][tier] = fields[2 * i + 1].split()
+    return table
+
+
+def extractObjects(entries):
+    """ID to name, category & type table for Data/Objects."""
+    table = {}
+    for itemId, data in entries:
+        table[itemId] = {"Name": data["Name"], "Category": data.get("Category", 0), "Type": data.get("Type", "")}
+    return table
+
+
+def extractWeapons(entries):
+    """ID to name & type table for Data/Weapons."""
+    return {itemId: {"Name": data["Name"], "Type": data.get("Type", 0)} for itemId, data in entries}
+
+
+EXTRACTORS = {"Objects": extractObjects,
+              "BigCraftables": extractBigCraftables,
+              "Weapons": extractWeapons,
+              "Crops": extractCrops,
+              "FruitTrees": extractFruitTrees,
+              "NPCGiftTastes": extractGiftTastes}
+
+
+def extractAsset(asset, path, loader):
+    """Streams a strict json asset into its extractor, assets that need pyjson5 are parsed whole by the loader."""
+    stat = os.stat(path)
+    if not loader.isJson5(path, [stat.st_size, stat.st_mtime_ns]):
+        try:
+            return EXTRACTORS[asset](iterEntries(path))
+        except ValueError:
+            pass  # comments, trailing commas etc, the loader remembers it for next time
+    return EXTRACTORS[asset](loader.load(path).items())
+
+
+def findAssets(contentDir):
+    """Walks the Content folder for Data/<asset>.json, localized variants are skipped."""
+    found = {}
+    wanted = {"{}.json".format(asset).lower(): asset for asset in ASSETS}
+    for root, dirs, files in os.walk(contentDir):
+        dirs.sort()
+        if os.path.basename(root).lower() != "data":
+            continue
+        for fileName in files:
+            asset = wanted.get(fileName.lower())
+            if asset and asset not in found:
+                found[asset] = os.path.join(root, fileName)
+    return found
+
+
+def iterEntries(path, chunkSize=CHUNKSIZE):
+    """Yields the top level (key, value) pairs of a json object, reading the file a chunk at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def more():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunkSize)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def peek():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in WHITESPACE:
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if eof:
+                    raise ValueError("{}: unexpected end of file".format(path))
+                more()
+
+        def value():
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    result, end = decoder.raw_decode(buf, pos)
+                    # a number cut by the buffer edge decodes short, 12 of "12." or "12e", and may continue in the next chunk
+                    cut = isinstance(result, (int, float)) and not isinstance(result, bool) and not buf[end:].lstrip(NUMBERCHARS)
+                    if eof or not cut:
+                        pos = end
+                        return result
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                more()
+
+        if peek() != "{":
+            raise ValueError("{}: top level is not a json object".format(path))
+        pos += 1
+        if peek() == "}":
+            return
+        while True:
+            key = value()
+            if peek() != ":":
+                raise ValueError("{}: expected ':' at entry {}".format(path, key))
+            pos += 1
+            yield key, value()
+            sep = peek()
+            pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError("{}: expected ',' after entry {}".format(path, key))
+
+
+def loadPrevious(outPath):
+    """Returns the cached per-asset tables of a previous run, or {} if there is none or it is outdated."""
+    try:
+        with open(outPath, encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(previous, dict) or previous.get("Version") != DATAVERSION:
+        return {}
+    return previous.get("Assets", {})
+
+
+def nameTables(assets):
+    """Builds the Name to ID tables the converter looks items up in."""
+    tables = {"Objects": {}, "BigCraftables": {}, "Weapons": {}, "Crops": {}, "FruitTrees": {}, "Categories": {}, "GiftTastes": {}}
+    objects = assets.get("Objects", {}).get("Table", {})
+    for itemId, data in objects.items():
+        # later IDs win on duplicate names, as the old flat dict did
+        tables["Objects"][data["Name"]] = itemId
+        tables["Categories"][itemId] = data["Category"]
+    for kind in ["BigCraftables", "Weapons"]:
+        for itemId, data in assets.get(kind, {}).get("Table", {}).items():
+            tables[kind][data["Name"]] = itemId
+    # crops & fruit trees are looked up by the name of what they produce
+    for seedId, data in assets.get("Crops", {}).get("Table", {}).items():
+        if data["HarvestItemId"] in objects:
+            tables["Crops"][objects[data["HarvestItemId"]]["Name"]] = seedId
+    for saplingId, data in assets.get("FruitTrees", {}).get("Table", {}).items():
+        for fruitId in data["Fruit"]:
+            if fruitId in objects:
+                tables["FruitTrees"][objects[fruitId]["Name"]] = saplingId
+    tables["GiftTastes"] = assets.get("NPCGiftTastes", {}).get("Table", {})
+    return tables
+
+
+def unqualify(itemId):
+    """Strips a (O)-style type qualifier from an item ID."""
+    itemId = str(itemId)
+    if itemId.startswith("(") and ")" in itemId:
+        return itemId.split(")", 1)[1]
+    return itemId
+
 
 if __name__ == "__main__":
-    rawvanillaobjects = json.load(open(VANILLAPATH, encoding="utf-8"))
-    outDict = {}
-    for id, data in rawvanillaobjects.items():
-        outDict[data["Name"]] = id
-    outJson = json.dumps(outDict)
-    filename = "vanillaObjects.json"
-    with open(filename, 'w') as f:
-        f.write(outJson)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--content", dest="contentDir", default=VANILLAPATH, help="Unpacked Stardew Content folder")
+    parser.add_argument("--out", dest="outPath", default="vanillaObjects.json", help="Output file")
+    parser.add_argument("--rebuild", dest="rebuild", action="store_true", help="Parse every asset even if it is unchanged")
+    args = parser.parse_args()
+    found = findAssets(args.contentDir)
+    previous = {} if args.rebuild else loadPrevious(args.outPath)
+    assets = {}
+    loader = JsonLoader()
+    for asset in ASSETS:
+        if asset not in found:
+            print("{} not found under {}, skipping".format(asset, args.contentDir))
+            continue
+        stat = os.stat(found[asset])
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        if asset in previous and previous[asset]["Stamp"] == stamp:
+            assets[asset] = previous[asset]
+            print("{}: unchanged, {} entries".format(asset, len(assets[asset]["Table"])))
+            continue
+        assets[asset] = {"Stamp": stamp, "Table": extractAsset(asset, found[asset], loader)}
+        print("{}: parsed, {} entries".format(asset, len(assets[asset]["Table"])))
+    loader.save()
+    outDict = {"Version": DATAVERSION}
+    outDict.update(nameTables(assets))
+    outDict["Assets"] = assets
+    tmpPath = args.outPath + ".tmp"
+    with open(tmpPath, 'w', encoding="utf-8") as f:
+        json.dump(outDict, f, separators=(",", ":"))
+    os.replace(tmpPath, args.outPath)
+    # compile the converter's index now so the first conversion doesn't pay for it
+    loadVanillaIndex(args.outPath)
@@ -1,8 +1,33 @@
-from dataclasses import dataclass, field
+"""Content Patcher data models, each serialized by to_dict()."""
+from dataclasses import dataclass, field, fields
 from typing import Optional
 
 
-@dataclass
+def serializer(*mandatoryKeys):
+    """Class decorator giving a slotted dataclass a to_dict() compiled once from its fields.
+
+    Fields in mandatoryKeys are always written, the rest only when truthy, in declaration order.
+    """
+    def decorate(cls):
+        lines = ["def to_dict(self):", "    outDict = {}"]
+        for f in fields(cls):
+            if f.name in mandatoryKeys:
+                lines.append("    outDict[{0!r}] = self.{0}".format(f.name))
+            else:
+                lines.append("    v = self.{}".format(f.name))
+                lines.append("    if v:")
+                lines.append("        outDict[{!r}] = v".format(f.name))
+        lines.append("    return outDict")
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        namespace["to_dict"].__qualname__ = "{}.to_dict".format(cls.__qualname__)
+        cls.to_dict = namespace["to_dict"]
+        return cls
+    return decorate
+
+
+@serializer("Name", "DisplayName", "Description", "SpriteIndex")
+@dataclass(slots=True)
 class BigObject():
     Name: str = ""
     DisplayName: str = ""
@@ -16,18 +41,8 @@ class BigObject():
     SpriteIndex: Optional[int] = 0
     ContextTags: Optional[list] = field(default_factory=lambda: [])
 
-    def to_dict(self):
-        outDict = {}
-        mandatoryKeys = ["Name", "DisplayName", "Description", "SpriteIndex"]
-        for k, v in self.__dict__.items():
-            if k in mandatoryKeys or v:
-                outDict[k] = v
-            elif k == "CanBePlacedIndoors" and not v:
-                outDict[k] == v
-        return outDict
-
 
-@dataclass
+@dataclass(slots=True)
 class Buff():
     Duration: int = 0
     Id: str = ""
@@ -40,13 +55,15 @@ class Buff():
     Defense: Optional[int] = 0
     MagnetRadius: Optional[int] = 0
     MaxStamina: Optional[int] = 0
+    Speed: Optional[int] = 0
 
     def to_dict(self):
         outDict = {"Id": "",
                    "Duration": 0,
                    "IsDebuff": False,
                    "CustomAttributes": {}}
-        for k, v in self.__dict__.items():
+        for k in self.__slots__:
+            v = getattr(self, k)
             if k in ["Id", "Duration"]:
                 outDict[k] == v
             else:
@@ -57,7 +74,8 @@ class Buff():
         return outDict
 
 
-@dataclass
+@serializer("Seasons", "DaysInPhase", "HarvestItemID", "Texture", "SpriteIndex")
+@dataclass(slots=True)
 class Crop():
     Seasons: list = field(default_factory=lambda: [])
     DaysInPhase: list = field(default_factory=lambda: [])
@@ -80,16 +98,9 @@ class Crop():
     CountForPolyculture: Optional[bool] = False
     PlantableLocationRules: Optional[dict] = field(default_factory=lambda: [])
 
-    def to_dict(self):
-        outDict = {}
-        mandatoryKeys = ["Seasons", "DaysInPhase", "HarvestItemID", "Texture", "SpriteIndex"]
-        for k, v in self.__dict__.items():
-            if k in mandatoryKeys or v:
-                outDict[k] = v
-        return outDict
-
 
-@dataclass
+@serializer("DisplayName", "Seasons", "Fruit", "Texture", "TextureSpriteRow")
+@dataclass(slots=True)
 class FruitTree():
     DisplayName: str = ""
     Seasons: list = field(default_factory=lambda: [])
@@ -98,17 +109,10 @@ class FruitTree():
     TextureSpriteRow: int = 0
     PlantableLocationRule: Optional[list] = field(default_factory=lambda: [])
 
-    def to_dict(self):
-        outDict = {}
-        mandatoryKeys = ["DisplayName", "Seasons", "Fruit", "Texture",
-                         "TextureSpriteRow"]
-        for k, v in self.__dict__.items():
-            if k in mandatoryKeys or v:
-                outDict[k] = v
-        return outDict
-
 
-@dataclass
+@serializer("Name", "DisplayName", "Description", "Type", "Texture",
+            "SpriteIndex", "MinDamage", "MaxDamage", "CanBeLostOnDeath")
+@dataclass(slots=True)
 class MeleeWeapon():
     Name: str = ""
     DisplayName: str = ""
@@ -130,17 +134,10 @@ class MeleeWeapon():
     MineMinLevel: Optional[int] = -1
     Projectiles: Optional[list] = field(default_factory=lambda: [])
 
-    def to_dict(self):
-        outDict = {}
-        mandatoryKeys = ["Name", "DisplayName", "Description", "Type", "Texture",
-                         "SpriteIndex", "MinDamage", "MaxDamage", "CanBeLostOnDeath"]
-        for k, v in self.__dict__.items():
-            if k in mandatoryKeys or v:
-                outDict[k] = v
-        return outDict
 
-
-@dataclass
+@serializer("Name", "DisplayName", "Description", "Type",
+            "Category", "Price", "Texture", "SpriteIndex")
+@dataclass(slots=True)
 class SVObject():
     Name: str = ""
     DisplayName: str = ""
@@ -159,12 +156,3 @@ class SVObject():
     ExcludeFromRandomSale: Optional[bool] = False
     ExcludeFromFishingCollection: Optional[bool] = False
     ExcludeFromShippingCollection: Optional[bool] = False
-
-    def to_dict(self):
-        outDict = {}
-        mandatoryKeys = ["Name", "DisplayName", "Description", "Type",
-                         "Category", "Price", "Texture", "SpriteIndex"]
-        for k, v in self.__dict__.items():
-            if k in mandatoryKeys or v:
-                outDict[k] = v
-        return outDict
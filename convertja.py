@@ -1,16 +1,33 @@
 import argparse
 import copy
+import functools
+import glob
+import hashlib
+import heapq
+import io
 import json  # for writing
+import mmap
 import os
+import pickle
 import pprint
 import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from math import ceil, floor
 from typing import Optional
 
-import pyjson5  # for reading
 from PIL import Image
 from classes import BigObject, Buff, Crop, FruitTree, MeleeWeapon, SVObject
+from jsonloader import JsonLoader
+from readahead import ReadAhead, readFile
+from vanillaindex import NAMERE, loadVanillaIndex
 
 CATEGORIES = {"ArtisanGoods": -26,
               "Building Resources": -16,
@@ -96,138 +113,1011 @@ MODNPCS = {
     "Zoro": "EmpressKimi.Zoro"
 }
 
-NAMERE = r"[^a-zA-Z0-9_\.]"  # strips invalid chars from item IDs
+SHEETLAYOUTS = {"objects": (24, 16, 16),  # columns, tile width, tile height
+                "crops": (2, 128, 32),
+                "fruittrees": (1, 432, 80),
+                "weapons": (8, 16, 16),
+                "bigobjects": (8, 16, 32)}
+WRAPPEDSHEETS = {"objects", "weapons", "bigobjects"}  # the game wraps these sheets' SpriteIndex at the texture's width
+MAXTEXTURE = None  # (width, height) a spritesheet page may not exceed, set by --max-texture-size, None keeps one sheet of any height
+SPRITETHREADS = min(8, os.cpu_count() or 1)
+READAHEAD = 64  # json & png files read and parsed ahead of the converter at once, set by --read-ahead, 0 reads serially
+PNGPROFILES = {"fast": {"compress_level": 1},  # Pillow save() arguments for each --png-profile
+               "default": {},
+               "release": {"optimize": True}}
+PNGPROFILE = "default"
+JSONINDENT = 4  # None writes compact content json, set by --compact-json
+WRITEBUFFER = 1024 * 1024
+DEDUPESPRITES = False  # collapse identical sprites onto one tile, set by --dedupe-sprites
+DEFAULTLANGUAGE = "en"  # written to i18n/default.json, other languages only keep keys that differ from it
+MERGEGIFTS = False  # write every stage's gift tastes as one consolidated file, set by --merge-gifts
+MERGEPATCHES = False  # write every stage's patches to one file, merging EditData on the same target, set by --merge-patches
+MERGEDNAME = "merged"  # data/<name>.json written by --merge-patches
+STREAMING = False  # spool entries & i18n to disk and paste sprites as items convert instead of holding the pack in memory, set by --stream
+PATCHMERGEKEYS = {"LogName", "Action", "Target", "Entries", "When"}  # patches with any other field are never merged
+SPRITECACHEDIR = os.path.join(os.path.expanduser("~"), ".ja2cp", "sprites")
+SPRITECACHEMAX = 512 * 1024 * 1024  # bytes of decoded sprites kept before evicting the least recently used
+SPRITEFILES = {"Objects": {"Object": None},  # companion sprites of each JA folder's items by role, None is the json's own name
+               "BigCraftables": {"BigCraftable": None},
+               "Crops": {"Seeds": "seeds.png", "Crop": "crop.png"},
+               "FruitTrees": {"Sapling": "sapling.png", "Tree": "tree.png"},
+               "Weapons": {"Weapon": "weapon.png"}}
+PARALLELMIN = 64  # fewer files than this are decoded serially, pool startup costs more
+CONVERTERVERSION = "5"  # bump whenever conversion output changes, forces a full rebuild
+MANIFESTNAME = ".ja2cp-manifest.json"
+PROFILER = None  # a Profiler while --profile is on, the hooks do nothing otherwise
+PROFILESLOWEST = 20  # slowest source files listed in the profile report
+VANILLAINDEX = None  # the vanilla index shared with --batch worker processes, set by initBatchWorker
+WATCHFOLDERS = ["Objects", "Crops", "FruitTrees", "Weapons", "BigCraftables"]  # JA folders polled by --watch
+WATCHINTERVAL = 0.2  # seconds between --watch polls
+WATCHDEBOUNCE = 0.3  # seconds the sources must stay unchanged before a burst of saves is converted
 
 
+class Profiler():
+    """Collects wall/CPU time per stage & per build* call plus I/O counts for --profile."""
+
+    def __init__(self, slowest=PROFILESLOWEST):
+        self.stages = {}
+        self.calls = {}
+        self.counts = {"Entries": 0, "BytesRead": 0, "BytesWritten": 0}
+        self.sources = set()  # source json paths, a pack scanned by several stages or processes counts once
+        self.fileTimes = []
+        self.slowest = slowest
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.cpuStart = time.process_time()
+
+    def add(self, table, name, wall, cpu):
+        """Adds one timed call to the Stages or Calls table."""
+        with self.lock:
+            record = table.setdefault(name, {"Wall": 0.0, "CPU": 0.0, "Calls": 0})
+            record["Wall"] += wall
+            record["CPU"] += cpu
+            record["Calls"] += 1
+
+    def addFile(self, path, seconds):
+        """Records how long a source file took to parse & convert, keeping only the slowest."""
+        with self.lock:
+            if len(self.fileTimes) < self.slowest:
+                heapq.heappush(self.fileTimes, (seconds, path))
+            else:
+                heapq.heappushpop(self.fileTimes, (seconds, path))
+
+    def addSources(self, paths):
+        """Records source json files found by a scan."""
+        with self.lock:
+            self.sources.update(paths)
+
+    def count(self, name, amount):
+        """Adds to one of the Entries, BytesRead or BytesWritten counters."""
+        with self.lock:
+            self.counts[name] += amount
+
+    def merge(self, report):
+        """Folds a worker process's report() into this one."""
+        for table, name in [(self.stages, "Stages"), (self.calls, "Calls")]:
+            for key, record in report[name].items():
+                mine = table.setdefault(key, {"Wall": 0.0, "CPU": 0.0, "Calls": 0})
+                for column in mine:
+                    mine[column] += record[column]
+        for name in self.counts:
+            self.counts[name] += report[name]
+        self.sources.update(report.get("Sources", []))
+        for path, seconds in report["SlowestFiles"]:
+            heapq.heappush(self.fileTimes, (seconds, path))
+        self.fileTimes = heapq.nlargest(self.slowest, self.fileTimes)
+        heapq.heapify(self.fileTimes)
+
+    def peakRss(self, who):
+        """Peak resident set size in bytes, None where the resource module is missing (Windows)."""
+        try:
+            import resource
+        except ImportError:
+            return None
+        peak = resource.getrusage(who(resource)).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def report(self):
+        """Returns the profile as a json-ready dict."""
+        wall = time.perf_counter() - self.start
+        report = {"Wall": wall,
+                  "CPU": time.process_time() - self.cpuStart,
+                  "Stages": self.stages,
+                  "Calls": self.calls,
+                  "Files": len(self.sources),
+                  "FilesPerSec": len(self.sources) / wall if wall else 0,
+                  "EntriesPerSec": self.counts["Entries"] / wall if wall else 0,
+                  "PeakRSS": self.peakRss(lambda r: r.RUSAGE_SELF),
+                  "PeakRSSChildren": self.peakRss(lambda r: r.RUSAGE_CHILDREN),
+                  "SlowestFiles": [[path, seconds] for seconds, path in sorted(self.fileTimes, reverse=True)]}
+        report.update(self.counts)
+        return report
+
+    def write(self, outPath):
+        """Writes the report to outPath."""
+        with open(outPath, 'w', encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        print("Profile written to {}".format(outPath))
+
+
+def profiled(stage=None):
+    """Times each call of the decorated function under stage, or under its own name in Calls if stage is None."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if PROFILER is None:
+                return func(*args, **kwargs)
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                table = PROFILER.calls if stage is None else PROFILER.stages
+                PROFILER.add(table, stage or func.__name__, time.perf_counter() - wall, time.process_time() - cpu)
+        return wrapper
+    return decorator
+
+
+class JsonDecodeError(Exception):
+    """Raised when a JA json file cannot be parsed."""
+
+    def __init__(self, path, reason):
+        self.path = path
+        self.reason = reason
+        # both args are kept so the error unpickles intact when raised in a worker process
+        super().__init__(path, reason)
+
+    def __str__(self):
+        return "Could not parse {}: {}".format(self.path, self.reason)
+
+
+JSONLOADER = JsonLoader()
+
+
+class DocumentStore():
+    """Run-scoped cache of parsed JA json files, each file is decoded once."""
+
+    def __init__(self, jobs=1):
+        self.docs = {}
+        self.hits = 0
+        self.misses = 0
+        self.jobs = jobs
+        self.pending = None  # ReadAhead stream of preloaded files load() has not reached yet
+        self.pendingKeys = set()
+        self.unread = set()  # preloaded files counted as misses, their first load() is not a hit
+
+    @profiled("parse")
+    def decodeParallel(self, todo):
+        """Decodes todo in chunks across a process pool, returns (path, data) pairs in input order."""
+        chunkSize = ceil(len(todo) / (self.jobs * 4))
+        chunks = [todo[n:n + chunkSize] for n in range(0, len(todo), chunkSize)]
+        results = []
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            # map() yields in submission order so SpriteIndex assignment is unchanged
+            for chunkResults, loaderChanges in pool.map(decodeChunkWorker, chunks):
+                results += chunkResults
+                JSONLOADER.merge(loaderChanges)
+        if PROFILER is not None:
+            PROFILER.count("BytesRead", sum(SOURCES.size(path) for path in todo))
+        return results
+
+    def forget(self, paths):
+        """Drops parsed copies of paths that changed on disk."""
+        self.takePending()
+        for path in paths:
+            self.docs.pop(self.key(path), None)
+            self.unread.discard(self.key(path))
+
+    def key(self, path):
+        """Normalizes a path so every spelling of a file shares one entry."""
+        return os.path.normcase(os.path.abspath(path)).replace("\\", "/")
+
+    def load(self, path):
+        """Returns the parsed json at path, parsing it on first access."""
+        docKey = self.key(path)
+        if docKey in self.pendingKeys:
+            self.takePending(docKey)
+        if docKey in self.unread:
+            self.unread.discard(docKey)
+        elif docKey in self.docs:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.docs[docKey] = decodeJson(path)
+        # --stream keeps memory flat, a file two converters read is parsed twice
+        return self.docs.pop(docKey) if STREAMING else self.docs[docKey]
+
+    def preload(self, paths):
+        """Decodes any unseen paths up front, across a process pool when there are enough of them."""
+        self.takePending()
+        todo = []
+        seen = set()
+        for path in paths:
+            docKey = self.key(path)
+            if docKey not in self.docs and docKey not in seen:
+                seen.add(docKey)
+                todo.append(docKey)
+        if not todo:
+            return
+        if self.jobs > 1 and len(todo) >= PARALLELMIN and not STREAMING:
+            results = self.decodeParallel(todo)
+        elif READAHEAD > 0:
+            # the build loop starts converting the first files while later ones are still being read
+            self.pending = iter(ReadAhead(todo, decodeJson, readSource, READAHEAD))
+            self.pendingKeys = set(todo)
+            return
+        elif STREAMING:
+            return  # load() parses each file as it is reached
+        else:
+            results = decodeChunk(todo)
+        for docKey, data in results:
+            self.docs[docKey] = data
+            self.unread.add(docKey)
+        self.misses += len(results)
+
+    def report(self):
+        """Prints hit/miss counts for the run."""
+        print("Parsed {} json files, {} cache hits".format(self.misses, self.hits))
+
+    def takePending(self, docKey=None):
+        """Moves streamed files into docs until docKey has arrived, or all of them when docKey is None."""
+        if self.pending is None:
+            return
+        try:
+            for pendingKey, data in self.pending:
+                self.pendingKeys.discard(pendingKey)
+                self.docs[pendingKey] = data
+                self.unread.add(pendingKey)
+                self.misses += 1
+                if pendingKey == docKey:
+                    return
+        except Exception:
+            self.pending = None
+            self.pendingKeys = set()
+            raise
+        self.pending = None
+        self.pendingKeys = set()
+
+
+DOCS = DocumentStore()
+
+
+class Manifest():
+    """Content hashes of source files & the output they produced, lets reruns skip unchanged files."""
+
+    def __init__(self):
+        self.path = None
+        self.files = {}
+        self.sheets = {}
+        self.hashes = {}
+        self.touchedFiles = set()
+        self.touchedSheets = set()
+        self.reused = 0
+        self.converted = 0
+
+    def changes(self):
+        """Returns the records written this run, for merging back from a worker process."""
+        return {"Files": {k: self.files[k] for k in self.touchedFiles},
+                "Sheets": {k: self.sheets[k] for k in self.touchedSheets},
+                "Reused": self.reused,
+                "Converted": self.converted}
+
+    def forget(self, paths):
+        """Drops the run's cached hashes of paths that changed on disk."""
+        for path in paths:
+            self.hashes.pop(DOCS.key(path), None)
+
+    def hash(self, path):
+        """Returns the sha1 of a file's contents, each file is hashed once per run."""
+        fileKey = DOCS.key(path)
+        if fileKey not in self.hashes:
+            with open(path, "rb") as f:
+                self.hashes[fileKey] = hashlib.sha1(f.read()).hexdigest()
+        return self.hashes[fileKey]
+
+    def lookup(self, kind, path, context):
+        """Returns the cached result for path if its contents & context are unchanged."""
+        if self.path is None:
+            return None
+        record = self.files.get(DOCS.key(path))
+        resultKey = self.resultKey(kind, context)
+        if record and record["Hash"] == self.hash(path) and resultKey in record["Results"]:
+            self.reused += 1
+            return record["Results"][resultKey]
+        return None
+
+    def merge(self, changes):
+        """Folds a worker's changes() into this manifest."""
+        for fileKey, record in changes["Files"].items():
+            current = self.files.get(fileKey)
+            if current and current["Hash"] == record["Hash"]:
+                current["Results"].update(record["Results"])
+            else:
+                self.files[fileKey] = record
+        self.sheets.update(changes["Sheets"])
+        self.touchedFiles.update(changes["Files"])
+        self.touchedSheets.update(changes["Sheets"])
+        self.reused += changes["Reused"]
+        self.converted += changes["Converted"]
+
+    def open(self, dstDir, vanillaFile, rebuild=False):
+        """Loads the manifest in dstDir, it is discarded if the converter or vanilla data changed."""
+        if STREAMING:
+            # cached results grow with the pack, --stream converts everything & records nothing
+            self.path = None
+            return
+        self.path = "{}{}".format(dstDir, MANIFESTNAME)
+        self.files = {}
+        self.sheets = {}
+        self.touchedFiles = set()
+        self.touchedSheets = set()
+        self.vanillaHash = self.hash(vanillaFile)
+        if rebuild or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved["Version"] != CONVERTERVERSION or saved["VanillaHash"] != self.vanillaHash:
+            print("Converter or vanilla data changed since the last run, rebuilding everything")
+            return
+        self.files = saved["Files"]
+        self.sheets = saved["Sheets"]
+
+    def record(self, kind, path, context, result):
+        """Stores a freshly converted result for path."""
+        self.converted += 1
+        if self.path is None:
+            return
+        fileKey = DOCS.key(path)
+        fileHash = self.hash(path)
+        if fileKey not in self.files or self.files[fileKey]["Hash"] != fileHash:
+            self.files[fileKey] = {"Hash": fileHash, "Results": {}}
+        self.touchedFiles.add(fileKey)
+        self.files[fileKey]["Results"][self.resultKey(kind, context)] = result
+
+    def recordSheet(self, outPath, sheetHash, tiles=None, overflow=False):
+        """Stores the input hash & per-tile sprites of a freshly written spritesheet."""
+        if self.path is not None:
+            stat = os.stat(outPath)
+            self.sheets[DOCS.key(outPath)] = {"Hash": sheetHash,
+                                              "Tiles": tiles,
+                                              "Overflow": overflow,
+                                              "Output": [stat.st_size, stat.st_mtime_ns]}
+            self.touchedSheets.add(DOCS.key(outPath))
+
+    def report(self):
+        """Prints how many items were reused from the last run."""
+        if self.path is not None:
+            print("Reused {} cached conversions, converted {}".format(self.reused, self.converted))
+
+    def resultKey(self, kind, context):
+        """Builds the key a result is stored under, a file can feed several converters & modes."""
+        return "{}|{}".format(kind, "|".join(str(c) for c in context))
+
+    def save(self):
+        """Writes the manifest, dropping source files that no longer exist."""
+        if self.path is None:
+            return
+        files = {k: v for k, v in self.files.items() if os.path.exists(k)}
+        saved = {"Version": CONVERTERVERSION,
+                 "VanillaHash": self.vanillaHash,
+                 "Files": files,
+                 "Sheets": self.sheets}
+        with open(self.path, 'w', encoding="utf-8") as f:
+            json.dump(saved, f)
+
+    def previousSheet(self, outPath):
+        """Returns last run's record for outPath if the file on disk is still the one it wrote, else None."""
+        record = self.sheets.get(DOCS.key(outPath)) if self.path is not None else None
+        if record is None or record["Tiles"] is None:
+            return None
+        try:
+            stat = os.stat(outPath)
+        except OSError:
+            return None
+        return record if record["Output"] == [stat.st_size, stat.st_mtime_ns] else None
+
+    def sheetCurrent(self, outPath, sheetHash):
+        """True if outPath exists & was built from exactly these sprites last run."""
+        if self.path is None or not os.path.exists(outPath):
+            return False
+        record = self.sheets.get(DOCS.key(outPath))
+        return record is not None and record["Hash"] == sheetHash
+
+    def sheetHash(self, spriteList, spriteType):
+        """Hashes a spritesheet's layout & the contents of every sprite in it."""
+        if self.path is None:
+            return None
+        sheet = hashlib.sha1(spriteType.encode("utf-8"))
+        for imgpath, sidx in sorted(spriteList.items()):
+            sheet.update("{}|{}|{}\n".format(imgpath, sidx, self.hash(imgpath)).encode("utf-8"))
+        return sheet.hexdigest()
+
+    def sheetTiles(self, spriteList):
+        """Maps each tile index to the [path, content hash] of the sprites pasted on it."""
+        if self.path is None:
+            return None
+        tiles = {}
+        for imgpath, sidx in spriteList.items():
+            tiles.setdefault(str(sidx), []).append([imgpath, self.hash(imgpath)])
+        return tiles
+
+    def stale(self, paths):
+        """Filters paths down to those changed since the last run."""
+        if self.path is None:
+            return paths
+        staleFiles = []
+        for path in paths:
+            record = self.files.get(DOCS.key(path))
+            if not record or record["Hash"] != self.hash(path):
+                staleFiles.append(path)
+        return staleFiles
+
+
+MANIFEST = Manifest()
+
+
+class SpriteCache():
+    """On-disk cache of decoded RGBA sprites, memory-mapped back instead of decoding the png again."""
+
+    def __init__(self, cacheDir=SPRITECACHEDIR, maxBytes=SPRITECACHEMAX):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.enabled = True
+        self.entries = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def has(self, imgpath):
+        """True if the sprite at imgpath is cached at its current size & mtime."""
+        key = self.key(imgpath)
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.readIndex()
+            return key in self.entries
+
+    def key(self, imgpath):
+        """Builds a sprite's cache key from its path, size & mtime."""
+        stat = os.stat(imgpath)
+        return "{}|{}|{}".format(DOCS.key(imgpath), stat.st_size, stat.st_mtime_ns)
+
+    def load(self, imgpath, raw=None):
+        """Returns the RGBA sprite at imgpath, from the cache if its size & mtime are unchanged. raw is its png bytes if already read."""
+        key = self.key(imgpath)
+        with self.lock:
+            if self.entries is None:
+                self.entries = self.readIndex()
+            entry = self.entries.get(key)
+        if entry:
+            try:
+                with open(os.path.join(self.cacheDir, entry["File"]), "rb") as f:
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                img = Image.frombuffer("RGBA", tuple(entry["Size"]), buf, "raw", "RGBA", 0, 1)
+                with self.lock:
+                    entry["Used"] = time.time()
+                    self.hits += 1
+                return img
+            except (OSError, ValueError):
+                pass  # evicted by another run, decode it again
+        # paste() converts to the sheet's RGBA anyway, so caching the converted sprite changes nothing
+        with Image.open(imgpath if raw is None else io.BytesIO(raw)) as src:
+            img = src.convert("RGBA")
+        fileName = "{}.rgba".format(hashlib.sha1(key.encode("utf-8")).hexdigest())
+        os.makedirs(self.cacheDir, exist_ok=True)
+        tmpPath = os.path.join(self.cacheDir, "{}.{}.tmp".format(fileName, threading.get_ident()))
+        with open(tmpPath, "wb") as f:
+            f.write(img.tobytes())
+        os.replace(tmpPath, os.path.join(self.cacheDir, fileName))
+        with self.lock:
+            self.entries[key] = {"File": fileName,
+                                 "Size": list(img.size),
+                                 "Bytes": img.width * img.height * 4,
+                                 "Used": time.time()}
+            self.misses += 1
+        return img
+
+    def readIndex(self):
+        """Reads the cache index, an unreadable index just empties the cache."""
+        try:
+            with open(os.path.join(self.cacheDir, "index.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def report(self):
+        """Prints sprite cache hits & misses."""
+        if self.enabled and self.entries is not None:
+            print("Sprite cache: {} hits, {} decoded".format(self.hits, self.misses))
+
+    def save(self):
+        """Writes the index, merged with any written meanwhile, after evicting least recently used sprites."""
+        if not self.enabled or self.entries is None:
+            return
+        with self.lock:
+            entries = self.readIndex()
+            for key, entry in self.entries.items():
+                if key not in entries or entries[key]["Used"] < entry["Used"]:
+                    entries[key] = entry
+            total = sum(entry["Bytes"] for entry in entries.values())
+            for key, entry in sorted(entries.items(), key=lambda kv: kv[1]["Used"]):
+                if total <= self.maxBytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cacheDir, entry["File"]))
+                except OSError:
+                    pass
+                total -= entry["Bytes"]
+                del entries[key]
+            os.makedirs(self.cacheDir, exist_ok=True)
+            indexPath = os.path.join(self.cacheDir, "index.json")
+            # worker processes save concurrently, each through its own temp file
+            tmpPath = "{}.{}.tmp".format(indexPath, os.getpid())
+            with open(tmpPath, 'w', encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmpPath, indexPath)
+            self.entries = entries
+
+
+SPRITECACHE = SpriteCache()
+
+
+class SpriteCompositor():
+    """Reads sprites ahead & decodes them in a thread pool, pasting them as they arrive while holding a bounded number at once."""
+
+    def __init__(self, threads=SPRITETHREADS, window=None, cache=SPRITECACHE):
+        self.cache = cache
+        self.threads = threads
+        self.window = READAHEAD if window is None else window
+        self.held = 0
+        self.peak = 0
+        self.overflow = False  # a sprite bigger than its tile spilled onto its neighbours
+        self.lock = threading.Lock()
+
+    def load(self, imgpath, raw=None):
+        """Fully decodes a sprite & closes its file handle, raw is its png bytes if read() already read them."""
+        if PROFILER is not None:
+            PROFILER.count("BytesRead", SOURCES.size(imgpath))
+        if self.cache is not None and self.cache.enabled:
+            img = self.cache.load(imgpath, raw)
+        else:
+            with Image.open(imgpath if raw is None else io.BytesIO(raw)) as img:
+                img.load()
+        with self.lock:
+            self.held += 1
+            self.peak = max(self.peak, self.held)
+        return img
+
+    @profiled("sprites")
+    def paste(self, base, spriteList, spriteType):
+        """Pastes every sprite in spriteList onto base at its SpriteIndex's tile, in spriteList order so overlapping tiles land as before."""
+        if self.window <= 0:
+            for imgpath, sidx in spriteList.items():
+                self.pasteTile(base, self.load(imgpath), sidx, spriteType)
+            return
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for imgpath, img in ReadAhead(spriteList, self.load, self.read, self.window, pool):
+                self.pasteTile(base, img, spriteList[imgpath], spriteType)
+
+    def pasteTile(self, base, img, sidx, spriteType, top=0):
+        """Pastes one decoded sprite & releases it, base starts at sheet row top."""
+        columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+        if img.width > tileWidth or img.height > tileHeight:
+            self.overflow = True
+        x, y = tilePosition(spriteType, sidx)
+        base.paste(img, (x, y - top))
+        img.close()
+        with self.lock:
+            self.held -= 1
+
+    def read(self, imgpath):
+        """Reads a sprite's png bytes ahead of decoding, None when the sprite cache will supply its pixels."""
+        if self.cache is not None and self.cache.enabled and self.cache.has(imgpath):
+            return None
+        with open(imgpath, "rb") as f:
+            return f.read()
+
+
+@dataclass(slots=True)
+class SourceItem():
+    """One JA item json & the companion sprites found beside it."""
+    jsonPath: str
+    size: int
+    mtime: int
+    sprites: dict = field(default_factory=dict)  # SPRITEFILES role to png path, missing sprites are left out
+
+
+class SourceIndex():
+    """Run-scoped index of each JA pack's item jsons & sprites, every pack is walked once for all converters."""
+
+    def __init__(self):
+        self.packs = {}
+        self.stamps = {}  # path to (size, mtime) of every indexed file, from the walk's DirEntry
+
+    def forget(self, paths):
+        """Drops the index of any pack paths changed in, it is walked again on next use."""
+        for path in paths:
+            self.stamps.pop(path, None)
+        changedKeys = [DOCS.key(path) for path in paths]
+        for packKey in list(self.packs):
+            if any(changedKey.startswith(packKey) for changedKey in changedKeys):
+                del self.packs[packKey]
+
+    def items(self, srcDir, kind):
+        """Returns the SourceItems of srcDir's SPRITEFILES folder kind, walking the pack on first use."""
+        packKey = DOCS.key(srcDir)
+        if packKey not in self.packs:
+            self.packs[packKey] = self.scan(srcDir)
+        return self.packs[packKey][kind]
+
+    def jsonPaths(self, srcDir, kind):
+        """The json paths of items(), in SpriteIndex order."""
+        return [item.jsonPath for item in self.items(srcDir, kind)]
+
+    @profiled("scan")
+    def scan(self, srcDir):
+        """Walks every SPRITEFILES folder of srcDir, reporting items whose sprites are missing."""
+        pack = {}
+        for kind, roles in SPRITEFILES.items():
+            pack[kind] = []
+            folder = "{}{}".format(srcDir, kind)
+            if os.path.isdir(folder):
+                self.walk(folder, roles, pack[kind])
+        if PROFILER is not None:
+            PROFILER.addSources(os.path.realpath(item.jsonPath) for items in pack.values() for item in items)
+        return pack
+
+    def size(self, path):
+        """Size of a file, from the walk if it was indexed."""
+        if path in self.stamps:
+            return self.stamps[path][0]
+        return os.path.getsize(path)
+
+    def walk(self, path, roles, items):
+        """Appends the items under path in scandir order, the order SpriteIndex values are assigned in."""
+        entries = list(os.scandir(path))
+        # one listing answers every companion lookup in the folder, case-insensitively as on Windows
+        files = {entry.name.lower(): entry for entry in entries if not entry.is_dir(follow_symlinks=False)}
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                self.walk(entry.path, roles, items)
+            elif entry.name.endswith(".json"):
+                stat = entry.stat()
+                item = SourceItem(entry.path.replace("\\", "/"), stat.st_size, stat.st_mtime_ns)
+                self.stamps[item.jsonPath] = (item.size, item.mtime)
+                for role, fileName in roles.items():
+                    fileName = fileName or "{}.png".format(entry.name[0:-5])
+                    sprite = files.get(fileName.lower())
+                    if sprite is None:
+                        print("{}: missing {} sprite {}, its tile is left blank".format(item.jsonPath, role.lower(), fileName))
+                        continue
+                    spritePath = sprite.path.replace("\\", "/")
+                    spriteStat = sprite.stat()
+                    self.stamps[spritePath] = (spriteStat.st_size, spriteStat.st_mtime_ns)
+                    item.sprites[role] = spritePath
+                items.append(item)
+
+
+SOURCES = SourceIndex()
+
+
+class SpooledEntries():
+    """Append-only stand-in for a patch's Entries or a language's strings under --stream, values wait in a temp file.
+
+    A repeated key keeps its first position & its last value, as dict.update() does. Only keys & file offsets stay
+    in memory, and the spool is passed between processes by path.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix="ja2cp-", suffix=".spool")
+        self.file = os.fdopen(fd, "w+b")
+        self.offsets = {}
+        self.lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.offsets)
+
+    def __getstate__(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        return {"path": self.path, "offsets": self.offsets}
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.offsets = state["offsets"]
+        self.file = None
+        self.lock = threading.Lock()
+
+    def discard(self):
+        """Deletes the spool file, the keys stay readable."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def get(self, key, default=None):
+        """Reads one value back from the spool."""
+        if key not in self.offsets:
+            return default
+        return self.read(self.offsets[key])
+
+    def items(self):
+        """Yields (key, value) in insertion order, reading one value at a time."""
+        for key, offset in self.offsets.items():
+            yield key, self.read(offset)
+
+    def keys(self):
+        return self.offsets.keys()
+
+    def read(self, offset):
+        """Unpickles the value at offset, language files are written from several threads."""
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "r+b")
+            self.file.seek(offset)
+            return pickle.load(self.file)
+
+    def update(self, entries):
+        """Appends entries to the spool."""
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "r+b")
+            self.file.seek(0, os.SEEK_END)
+            for key, value in entries.items():
+                self.offsets[key] = self.file.tell()
+                pickle.dump(value, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class SpriteStream():
+    """Stand-in for a sprite list under --stream, sprites are pasted onto a band of tile rows as they are added.
+
+    Sprites arrive in SpriteIndex order, so rows above the newest tile are final & are compressed straight into
+    the png. Only the band & the sprites still decoding are held, however tall the sheet gets.
+    """
+
+    def __init__(self, spriteType):
+        columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+        self.spriteType = spriteType
+        self.compositor = SpriteCompositor()
+        self.pool = ThreadPoolExecutor(max_workers=self.compositor.threads)
+        self.pending = deque()
+        self.width = columns * tileWidth
+        self.band = Image.new("RGBA", (self.width, tileHeight))
+        self.top = 0  # sheet row of the band's first row, the rows above it are compressed already
+        self.height = 0  # sheet height needed by the tiles so far
+        self.count = 0
+        self.idat = tempfile.TemporaryFile()  # compressed rows, the png header needs the final height first
+        profile = PNGPROFILES[PNGPROFILE]
+        self.compressor = zlib.compressobj(profile.get("compress_level", 9 if profile.get("optimize") else 6))
+
+    def __len__(self):
+        return self.count
+
+    def __setitem__(self, imgpath, sidx):
+        self.count += 1
+        self.pending.append((self.pool.submit(self.compositor.load, imgpath), sidx))
+        if len(self.pending) > self.compositor.window:
+            self.pasteNext()
+
+    def advance(self, y):
+        """Compresses the sheet's rows above y & drops them from the band."""
+        done = min(y, self.top + self.band.height) - self.top
+        if done > 0:
+            self.writeRows(self.band.crop((0, 0, self.width, done)).tobytes())
+            self.band = self.band.crop((0, done, self.width, self.band.height))
+        if y - self.top > done:
+            # tile rows with no sprite at all, their sprites were missing
+            self.writeRows(bytes(self.width * 4 * (y - self.top - done)))
+        self.top = max(self.top, y)
+
+    def pasteNext(self):
+        """Pastes the oldest pending sprite, compressing the rows above its tile first."""
+        future, sidx = self.pending.popleft()
+        img = future.result()
+        columns, tileWidth, tileHeight = SHEETLAYOUTS[self.spriteType]
+        tileTop = tilePosition(self.spriteType, sidx)[1]
+        if tileTop < self.top:
+            raise ValueError("--stream needs sprites in SpriteIndex order, tile {} came after row {}".format(sidx, self.top))
+        self.advance(tileTop)
+        # room for a sprite taller than its tile, the plain sheet lets it spill onto the next row too
+        bottom = tileTop + max(tileHeight, img.height) - self.top
+        if bottom > self.band.height:
+            grown = Image.new("RGBA", (self.width, bottom))
+            grown.paste(self.band, (0, 0))
+            self.band = grown
+        self.height = max(self.height, tileTop + tileHeight)
+        self.compositor.pasteTile(self.band, img, sidx, self.spriteType, self.top)
+
+    @profiled("encode")
+    def save(self, outPath):
+        """Pastes the sprites still decoding & writes the png, the sheet is cut to its last used row like buildSprites'."""
+        start = time.perf_counter()
+        while self.pending:
+            self.pasteNext()
+        self.pool.shutdown()
+        if not self.height:
+            raise ValueError("{}: no sprites to write".format(outPath))
+        self.advance(self.height)
+        self.idat.write(self.compressor.flush())
+        self.idat.seek(0)
+
+        def chunk(f, kind, data):
+            f.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+        with open(outPath, 'wb', buffering=WRITEBUFFER) as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            chunk(f, b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 6, 0, 0, 0))
+            while True:
+                data = self.idat.read(WRITEBUFFER)
+                if not data:
+                    break
+                chunk(f, b"IDAT", data)
+            chunk(f, b"IEND", b"")
+            size = f.tell()
+        self.idat.close()
+        if PROFILER is not None:
+            PROFILER.count("BytesWritten", size)
+        print("{} written: {} bytes in {:.2f}s (stream)".format(outPath, size, time.perf_counter() - start))
+
+    def writeRows(self, raw):
+        """Compresses raw RGBA rows, each behind a PNG no-filter byte."""
+        rowBytes = self.width * 4
+        self.idat.write(self.compressor.compress(b"".join(b"\x00" + raw[n:n + rowBytes] for n in range(0, len(raw), rowBytes))))
+
+
+def decodeChunk(paths):
+    """Decodes a list of json files, returns (path, data) pairs in input order."""
+    return [(path, decodeJson(path)) for path in paths]
+
+
+def decodeChunkWorker(paths):
+    """decodeChunk in a pool worker, also returns which decoder each file needed."""
+    return decodeChunk(paths), JSONLOADER.changes()
+
+
+@profiled("parse")
+def decodeJson(path, raw=None):
+    """Parses one JA json file, raising JsonDecodeError with the path on failure. raw is its readFile() if already read."""
+    try:
+        if PROFILER is not None:
+            PROFILER.count("BytesRead", SOURCES.size(path))
+        if raw is None:
+            return JSONLOADER.load(path)
+        return JSONLOADER.decode(path, *raw)
+    except Exception as e:
+        raise JsonDecodeError(path, e) from e
+
+
+def addEntries(patch, entries):
+    """Adds converted entries to an output patch, counting them for --profile."""
+    patch["Entries"].update(entries)
+    if PROFILER is not None:
+        PROFILER.count("Entries", len(entries))
+
+
+def applyOptions(options):
+    """Applies the run-wide command line options, also used to set up worker processes."""
+    global DEDUPESPRITES, JSONINDENT, MAXTEXTURE, MERGEGIFTS, MERGEPATCHES, PNGPROFILE, PROFILER, READAHEAD, STREAMING
+    DOCS.jobs = options["jobs"]
+    SPRITECACHE.enabled = options["spriteCache"]
+    DEDUPESPRITES = options["dedupe"]
+    MERGEGIFTS = options.get("mergeGifts", False)
+    MERGEPATCHES = options.get("mergePatches", False)
+    PNGPROFILE = options["pngProfile"]
+    JSONINDENT = None if options["compactJson"] else 4
+    PROFILER = Profiler() if options.get("profilePath") else None
+    READAHEAD = options.get("readAhead", READAHEAD)
+    STREAMING = options.get("stream", False)
+    MAXTEXTURE = options.get("maxTexture")
+
+
+def batchMods(patterns):
+    """Expands mod folder paths & globs to (srcDir, UniqueID, Name) for every folder with a JA manifest.json."""
+    mods = []
+    srcDirs = set()
+    owners = {}
+    for pattern in patterns:
+        # JA folder names like "[JA] Foo" are glob character classes, so existing folders are taken literally
+        paths = [pattern] if os.path.isdir(pattern) else sorted(glob.glob(pattern))
+        for path in paths:
+            srcDir = path.replace("\\", "/").rstrip("/") + "/"
+            manifestPath = "{}manifest.json".format(srcDir)
+            if srcDir in srcDirs or not os.path.isfile(manifestPath):
+                continue
+            srcDirs.add(srcDir)
+            manifest = JSONLOADER.load(manifestPath)
+            if "UniqueID" not in manifest:
+                print("{} has no UniqueID, skipping".format(manifestPath))
+                continue
+            owner = owners.setdefault(manifest["UniqueID"], srcDir)
+            if owner != srcDir:
+                print("{} & {} share the UniqueID {}".format(owner, srcDir, manifest["UniqueID"]))
+            mods.append((srcDir, manifest["UniqueID"], manifest.get("Name", os.path.basename(srcDir[:-1]))))
+    return mods
+
+
+def batchStages(srcDir):
+    """Picks the stages for a JA mod folder from the item folders it contains."""
+    stages = []
+    if os.path.isdir("{}Crops".format(srcDir)):
+        stages.append("crops")
+    elif os.path.isdir("{}FruitTrees".format(srcDir)):
+        stages.append("trees")
+    elif os.path.isdir("{}Objects".format(srcDir)) or os.path.isdir("{}BigCraftables".format(srcDir)):
+        stages.append("artisan")
+    if os.path.isdir("{}Weapons".format(srcDir)):
+        stages.append("weapons")
+    return stages
+
+
+@profiled()
 def buildBigObjects(srcDir, modId, spritesheet, mode, i18n=None):
     """Converts big craftables to content patcher."""
     newObjects = {"LogName": "Raffadax New Big Objects - {}".format(mode),
                   "Action": "EditData",
                   "Target": "Data/BigCraftables",
-                  "Entries": {}
+                  "Entries": newEntries()
                   }
     objTexture = {"LogName": "Raffadax Big Object Textures - {}".format(mode),
                   "Action": "Load",
                   "Target": "Mods/{}/BigObjects/{}".format(modId, mode),
                   "FromFile": "assets/textures/{}.png".format(spritesheet)}
     if not i18n:
-        i18n = {"en": {}}
+        i18n = {"en": newEntries()}
     i = 0
-    spriteFiles = {}
-    jsonFiles = []
-    objDir = "{}BigCraftables".format(srcDir)
-    for entry in objectscan(objDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
-    for jf in jsonFiles:
-        try:
-            objData = pyjson5.load(open(jf, encoding="utf-8"))
-        except Exception:
-            print(jf)
-            quit()
-        bo = BigObject()
-        nameStr = re.sub(NAMERE, "", objData["Name"])
-        bo.Name = "{}_{}".format(modId, nameStr)
-        bo.DisplayName = "{{{{i18n:{}.DisplayName}}}}".format(nameStr)
-        i18n["en"]["{}.DisplayName".format(nameStr)] = objData["Name"]
-        bo.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
-        i18n["en"]["{}.Description".format(nameStr)] = objData["Description"]
-        if "Price" in objData:
-            bo.Price = objData["Price"]
-        if "ProvidesLight" in objData and objData["ProvidesLight"]:
-            bo.IsLamp = True
-        bo.Texture = "Mods/{}/BigObjects/{}".format(modId, mode)
-        bo.SpriteIndex = i
-        spritename = jf[0:-5] + ".png"
-        spriteFiles[spritename] = bo.SpriteIndex
-        newObjects["Entries"][bo.Name] = bo.to_dict()
-        if "NameLocalization" in objData:
-            for langKey, langStr in objData["NameLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Displayname".format(nameStr)] = langStr
-        if "DescriptionLocalization" in objData:
-            for langKey, langStr in objData["DescriptionLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Description".format(nameStr)] = langStr
+    spriteFiles = newSprites("bigobjects")
+    DOCS.preload(MANIFEST.stale(SOURCES.jsonPaths(srcDir, "BigCraftables")))
+    for item in SOURCES.items(srcDir, "BigCraftables"):
+        result = convertCached("bigobjects", item.jsonPath, [modId, mode, i], convertBigObject, modId, mode, i)
+        addEntries(newObjects, result["Entries"])
+        mergeI18n(i18n, result["i18n"])
+        if "BigCraftable" in item.sprites:
+            spriteFiles[item.sprites["BigCraftable"]] = i
         i += 1
 
     return [newObjects, spriteFiles, i18n, objTexture]
 
 
-def buildCooking(srcDir, modId, vanillaObjects):
+@profiled()
+def buildCooking(srcDir, modId, vanillaIndex):
     """Converts Recipe fields from JA objects to cooking recipes."""
-    objDir = "{}Objects".format(srcDir)
     newRecipes = {"LogName": "Raffadax New Cooking Recipes",
                   "Action": "EditData",
                   "Target": "Data/CookingRecipes",
-                  "Entries": {}}
-    jsonFiles = []
-    for entry in objectscan(objDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
+                  "Entries": newEntries()}
+    jsonFiles = SOURCES.jsonPaths(srcDir, "Objects")
+    DOCS.preload(MANIFEST.stale(jsonFiles))
     for jf in jsonFiles:
-        try:
-            objData = pyjson5.load(open(jf, encoding="utf-8"))
-        except Exception:
-            print(jf)
-            quit()
-        if "Recipe" in objData and objData["Recipe"] and (objData["Category"] == "Cooking" or objData["Category"] == -7):
-            output = "{}_{} {}".format(modId, objData["Name"].replace(" ", ""), objData["Recipe"]["ResultCount"])
-            ingredients = []
-            for iNode in objData["Recipe"]["Ingredients"]:
-                if isinstance(iNode["Object"], int) or iNode['Object'].isnumeric():
-                    iStr = "{} {}".format(iNode['Object'], iNode["Count"])
-                elif iNode["Object"] in vanillaObjects:
-                    iStr = "{} {}".format(vanillaObjects[iNode["Object"]], iNode["Count"])
-                else:
-                    nameStr = re.sub(NAMERE, "", iNode["Object"])
-                    iStr = "{}_{} {}".format(modId, nameStr, iNode["Count"])
-                ingredients.append(iStr)
-            newRecipes["Entries"][objData["Name"]] = "{}//{}/none/{}".format(" ".join(ingredients), output, objData["Name"])
+        result = convertCached("cooking", jf, [modId], convertCookingRecipe, modId, vanillaIndex)
+        addEntries(newRecipes, result["Entries"])
     return newRecipes
 
 
-def buildCrafting(srcDir, modId, vanillaObjects):
+@profiled()
+def buildCrafting(srcDir, modId, vanillaIndex):
     """Converts Recipe fields from JA objects & big craftables to crafting recipes."""
-    objDir = "{}Objects".format(srcDir)
-    bigObjDir = "{}BigCraftables".format(srcDir)
     newRecipes = {"LogName": "Raffadax New Crafting Recipes",
                   "Action": "EditData",
                   "Target": "Data/CraftingRecipes",
-                  "Entries": {}}
-    jsonFiles = []
-    for entry in objectscan(objDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
-    for entry in objectscan(bigObjDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
+                  "Entries": newEntries()}
+    jsonFiles = SOURCES.jsonPaths(srcDir, "Objects") + SOURCES.jsonPaths(srcDir, "BigCraftables")
+    DOCS.preload(MANIFEST.stale(jsonFiles))
     for jf in jsonFiles:
-        try:
-            objData = pyjson5.load(open(jf, encoding="utf-8"))
-        except Exception:
-            print(jf)
-            quit()
-        if "Recipe" in objData and objData["Recipe"] and (("Category" in objData and objData["Category"] == "Crafting") or jf.endswith("big-craftable.json")):
-            output = "{}_{} {}".format(modId, objData["Name"].replace(" ", ""), objData["Recipe"]["ResultCount"])
-            ingredients = []
-            isBC = "false"
-            if jf.endswith("big-craftable.json"):
-                isBC = "true"
-            for iNode in objData["Recipe"]["Ingredients"]:
-                if isinstance(iNode["Object"], int) or iNode['Object'].isnumeric():
-                    iStr = "{} {}".format(iNode['Object'], iNode["Count"])
-                elif iNode["Object"] in vanillaObjects:
-                    iStr = "{} {}".format(vanillaObjects[iNode["Object"]], iNode["Count"])
-                else:
-                    nameStr = re.sub(NAMERE, "", iNode["Object"])
-                    iStr = "{}_{} {}".format(modId, nameStr, iNode["Count"])
-                ingredients.append(iStr)
-            newRecipes["Entries"][objData["Name"]] = "{}//{}/{}/none/{}".format(" ".join(ingredients), output, isBC, objData["Name"])
+        result = convertCached("crafting", jf, [modId], convertCraftingRecipe, jf, modId, vanillaIndex)
+        addEntries(newRecipes, result["Entries"])
     return newRecipes
 
 
-def buildCrops(srcDir, modId, objectData, objectSprites, i18n, spritesheet, vanillaObjects):
+@profiled()
+def buildCrops(srcDir, modId, objectData, objectSprites, i18n, spritesheet, vanillaIndex):
     """Creates Seed objects & builds Data/Crops entries."""
-    cropDir = "{}Crops".format(srcDir)
     cropTexture = {"LogName": "Raffadax Crop Textures",
                    "Action": "Load",
                    "Target": "Mods/{}/Crops".format(modId),
@@ -235,196 +1125,34 @@ def buildCrops(srcDir, modId, objectData, objectSprites, i18n, spritesheet, vani
     newCrops = {"LogName": "Raffadax New Crops",
                 "Action": "EditData",
                 "Target": "Data/Crops",
-                "Entries": {}}
-    jsonFiles = []
-    cropSprites = {}
-    i = len(objectSprites)
+                "Entries": newEntries()}
+    cropSprites = newSprites("crops")
+    # seeds & saplings follow every object tile, including blank ones whose sprite is missing
+    i = max(len(objectSprites), len(SOURCES.items(srcDir, "Objects")))
     j = 0
-    for entry in objectscan(cropDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
-    for jf in jsonFiles:
-        data = pyjson5.load(open(jf, encoding="utf-8"))
-        # seed object
-        seedObj = SVObject()
-        nameStr = re.sub(NAMERE, "", data["SeedName"])
-        seedObj.Name = "{}_{}".format(modId, nameStr)
-        i18n["en"]["{}.Displayname".format(nameStr)] = data["SeedName"]
-        seedObj.DisplayName = "{{{{i18n: {}.Displayname}}}}".format(nameStr)
-        # build the description.
-        i18n["en"]["{}.Description".format(nameStr)] = data["SeedDescription"]
-        seedObj.Description = "{{{{i18n: {}.Description}}}}".format(nameStr)
-        seedObj.Type = "Seeds"
-        seedObj.Category = -74
-        if "SeedPurchasePrice" in data:
-            seedObj.Price = data["SeedPurchasePrice"]
-        seedObj.Texture = "Mods/{}/Objects/Crops".format(modId)
-        seedObj.SpriteIndex = i
-        spritename = jf.rsplit("/", 1)[0] + "/seeds.png"
-        if "SeedNameLocalization" in data:
-            for langKey, langStr in data["NameLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Displayname".format(nameStr)] = langStr
-        if "SeedDescriptionLocalization" in data:
-            for langKey, langStr in data["DescriptionLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Description".format(nameStr)] = langStr
-        objectSprites[spritename] = seedObj.SpriteIndex
-        objectData["Entries"][seedObj.Name] = seedObj.to_dict()
-
-        # crop object
-        cropObj = Crop()
-        cropObj.Seasons = data["Seasons"]
-        cropObj.DaysInPhase = data["Phases"]
-        cropName = re.sub(NAMERE, "", data["Product"])
-        if cropName in vanillaObjects:
-            cropObj.HarvestItemID = vanillaObjects[cropName]
-        else:
-            cropObj.HarvestItemID = "{}_{}".format(modId, cropName)
-        cropObj.Texture = "Mods/{}/Crops".format(modId)
-        if "RegrowthPhase" in data:
-            cropObj.RegrowDays = data["RegrowthPhase"]
-        if "TrellisCrop" in data:
-            cropObj.IsRaised = data["TrellisCrop"]
-        if "HarvestWithScythe" in data and data["HarvestWithScythe"]:
-            cropObj.HarvestMethod = "Scythe"
-        if "Bonus" in data:
-            if "MinimumPerHarvest" in data["Bonus"]:
-                cropObj.HarvestMinStack = data["Bonus"]["MinimumPerHarvest"]
-            if "MaximumPerHarvest" in data["Bonus"]:
-                cropObj.HarvestMaxStack = data["Bonus"]["MinimumPerHarvest"]
-            if "MaxIncreasePerFarmLevel" in data["Bonus"]:
-                cropObj.HarvestMaxIncreasePerFarmingLevel = data["Bonus"]["MaxIncreasePerFarmLevel"]
-            if "ExtraChance" in data["Bonus"]:
-                cropObj.ExtraHarvestChance = data["Bonus"]["ExtraChance"]
-        if "Colors" in data and data["Colors"]:
-            cropObj.TintColors = data["Colors"]
-        cropObj.SpriteIndex = j
-        cropspritename = jf.rsplit("/", 1)[0] + "/crop.png"
-        cropSprites[cropspritename] = cropObj.SpriteIndex
-        if "CropType" in data and data["CropType"]:
-            if data["CropType"] == "Paddy":
-                cropObj.IsPaddyCrop = True
-            if data["CropType"] == "IndoorsOnly":
-                newRule = {"Id": "{}_Rule".format(seedObj.Name),
-                           "Result": "Deny",
-                           "Condition": "LOCATION_IS_OUTDOORS Here"}
-                cropObj.PlantableLocationRules.append(newRule)
-        newCrops["Entries"][seedObj.Name] = cropObj.to_dict()
+    DOCS.preload(MANIFEST.stale(SOURCES.jsonPaths(srcDir, "Crops")))
+    for item in SOURCES.items(srcDir, "Crops"):
+        result = convertCached("crops", item.jsonPath, [modId, i, j], convertCrop, modId, i, j, vanillaIndex)
+        addEntries(objectData, result["Objects"])
+        addEntries(newCrops, result["Entries"])
+        mergeI18n(i18n, result["i18n"])
+        if "Seeds" in item.sprites:
+            objectSprites[item.sprites["Seeds"]] = i
+        if "Crop" in item.sprites:
+            cropSprites[item.sprites["Crop"]] = j
         i += 1
         j += 1
     return [objectData, newCrops, cropSprites, objectSprites, i18n, cropTexture]
 
 
-def buildObjects(srcDir, modId, spritesheet, mode, i18n):
-    """Converts JA objects to Content Patcher models including Gift Tastes."""
-    newObjects = {"LogName": "Raffadax New Objects - {}".format(mode),
-                  "Action": "EditData",
-                  "Target": "Data/Objects",
-                  "Entries": {}
-                  }
+@profiled("gifts")
+def buildGiftTastes(giftprefs, mode):
+    """Turns {npc: {tier: [items]}} into the NPCGiftTastes patch & HasMod-conditional patches for modded NPCs."""
     newGifts = {"LogName": "Raffadax Gift Taste Edit - {}".format(mode),
                 "Action": "EditData",
                 "Target": "Data/NPCGiftTastes",
                 "TextOperations": []}
     conditionalGifts = {}
-    objTexture = {"LogName": "Raffadax Object Textures - {}".format(mode),
-                  "Action": "Load",
-                  "Target": "Mods/{}/Objects/{}".format(modId, mode),
-                  "FromFile": "assets/textures/{}.png".format(spritesheet)}
-    i = 0
-    jsonFiles = []
-    spriteFiles = {}
-    giftprefs = {}
-    objDir = "{}Objects".format(srcDir)
-    tasteKeys = {"Love": 1, "Like": 3, "Neutral": 9, "Dislike": 5, "Hate": 7}
-    for entry in objectscan(objDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
-    for jf in jsonFiles:
-        try:
-            objData = pyjson5.load(open(jf, encoding="utf-8"))
-        except Exception:
-            print(jf)
-            quit()
-        newObj = SVObject()
-        nameRe = r"[^a-zA-Z0-9_\.]"
-        nameStr = re.sub(nameRe, "", objData["Name"])
-        newObj.Name = "{}_{}".format(modId, nameStr)
-        newObj.DisplayName = "{{{{i18n:{}.DisplayName}}}}".format(nameStr)
-        i18n["en"]["{}.DisplayName".format(nameStr)] = objData["Name"]
-        if "Category" in objData:
-            if isinstance(objData["Category"], str):
-                if objData["Category"].strip("-").isnumeric():
-                    newObj.Category = int(objData["Category"])
-                    if str(objData["Category"]) in CATINDICES:
-                        newObj.Type = CATINDICES[str(objData["Category"])]
-                    else:
-                        print("No Cat found for {}".format(objData["Category"]))
-                else:
-                    newObj.Type = objData["Category"]
-                    if newObj.Type in CATEGORIES:
-                        newObj.Category = CATEGORIES[newObj.Type]
-                    else:
-                        print("No Cat found for {}".format(newObj.Type))
-            else:
-                newObj.Category = objData["Category"]
-                newObj.Type = CATINDICES[str(objData["Category"])]
-                # print("Non string cat for {}".format(newObj.Name))
-        else:
-            print("No Category data for {}".format(objData["Name"]))
-            quit()
-        if "Description" in objData:
-            newObj.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
-            i18n["en"]["{}.Description".format(nameStr)] = objData["Description"]
-        if "Price" in objData:
-            newObj.Price = objData["Price"]
-        newObj.Texture = "Mods/{}/Objects/{}".format(modId, mode)
-        newObj.SpriteIndex = i
-        if "Edibility" in objData:
-            newObj.Edibility = objData["Edibility"]
-        if "EdibleIsDrink" in objData:
-            newObj.IsDrink = objData["EdibleIsDrink"]
-        if "EdibleBuffs" in objData and objData["EdibleBuffs"]:
-            newBuff = Buff()
-            newBuff.Id = "{}_buff".format(newObj.Name)
-            for bk, bv in objData["EdibleBuffs"].items():
-                if bk in ["Farming", "Mining", "Foraging", "Luck", "Fishing"]:
-                    setattr(newBuff, "{}Level".format(bk), bv)
-                else:
-                    setattr(newBuff, bk, bv)
-            newObj.Buffs.append(newBuff.to_dict())
-        if "ContextTags" in objData:
-            newObj.ContextTags = objData["ContextTags"]
-        if "CategoryTextOverride" in objData:  # this may have to become a CustomField
-            catName = re.sub(NAMERE, "", objData["CategoryTextOverride"])
-            newObj.ContextTags.append("category_{}".format(catName.lower()))
-        if "NameLocalization" in objData:
-            for langKey, langStr in objData["NameLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Displayname".format(nameStr)] = langStr
-        if "DescriptionLocalization" in objData:
-            for langKey, langStr in objData["DescriptionLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Description".format(nameStr)] = langStr
-        if "GiftTastes" in objData:
-            for tk, tdata in objData["GiftTastes"].items():
-                fieldIndex = tasteKeys[tk]
-                for npc in tdata:
-                    if npc not in VANILLANPCS and npc not in MODNPCS:
-                        print("Nonexistent NPC: {} in {}".format(npc, newObj.Name))
-                        quit()
-                    if npc not in giftprefs:
-                        giftprefs[npc] = {}
-                    if fieldIndex not in giftprefs[npc]:
-                        giftprefs[npc][fieldIndex] = []
-                    giftprefs[npc][fieldIndex].append(newObj.Name)
-        newObjects["Entries"][newObj.Name] = newObj.to_dict()
-        spritename = jf[0:-5] + ".png"
-        spriteFiles[spritename] = newObj.SpriteIndex
-        i += 1
     for npc, tierData in giftprefs.items():
         if npc in VANILLANPCS:
             for tier, itemList in tierData.items():
@@ -453,226 +1181,1180 @@ def buildObjects(srcDir, modId, spritesheet, mode, i18n):
     cGiftList = []
     for npc, prefData in conditionalGifts.items():
         cGiftList.append(prefData)
+    return [newGifts, cGiftList]
+
+
+@profiled()
+def buildObjects(srcDir, modId, spritesheet, mode, i18n):
+    """Converts JA objects to Content Patcher models including Gift Tastes."""
+    newObjects = {"LogName": "Raffadax New Objects - {}".format(mode),
+                  "Action": "EditData",
+                  "Target": "Data/Objects",
+                  "Entries": newEntries()
+                  }
+    objTexture = {"LogName": "Raffadax Object Textures - {}".format(mode),
+                  "Action": "Load",
+                  "Target": "Mods/{}/Objects/{}".format(modId, mode),
+                  "FromFile": "assets/textures/{}.png".format(spritesheet)}
+    i = 0
+    spriteFiles = newSprites("objects")
+    giftprefs = {}
+    DOCS.preload(MANIFEST.stale(SOURCES.jsonPaths(srcDir, "Objects")))
+    for item in SOURCES.items(srcDir, "Objects"):
+        result = convertCached("objects", item.jsonPath, [modId, mode, i], convertObject, modId, mode, i)
+        for npc, fieldIndex, itemName in result["Gifts"]:
+            if npc not in giftprefs:
+                giftprefs[npc] = {}
+            if fieldIndex not in giftprefs[npc]:
+                giftprefs[npc][fieldIndex] = []
+            giftprefs[npc][fieldIndex].append(itemName)
+        addEntries(newObjects, result["Entries"])
+        mergeI18n(i18n, result["i18n"])
+        if "Object" in item.sprites:
+            spriteFiles[item.sprites["Object"]] = i
+        i += 1
+    newGifts, cGiftList = buildGiftTastes(giftprefs, mode)
     return [newObjects, spriteFiles, newGifts, i18n, objTexture, cGiftList]
 
 
+def buildPages(pages, dstDir):
+    """Stitches together each [spriteList, fileName, spriteType] page returned by pageSprites."""
+    for spriteList, fileName, spriteType in pages:
+        buildSprites(spriteList, dstDir, fileName, spriteType)
+
+
+@profiled()
 def buildSprites(spriteList, dstDir, fileName, spriteType="objects"):
-    """Stitches together sprites."""
-    if spriteType == "objects":
-        imgHeight = ceil(len(spriteList) / 24) * 16
-        imgWidth = 384
-        base = Image.new("RGBA", (imgWidth, imgHeight))
-        for imgpath, sidx in spriteList.items():
-            img = Image.open(imgpath)
-            x = (sidx % 24) * 16
-            y = floor(sidx / 24) * 16
-            base.paste(img, (x, y))
-    elif spriteType == "crops":
-        imgWidth = 256
-        imgHeight = ceil(len(spriteList) / 2) * 32
-        base = Image.new("RGBA", (imgWidth, imgHeight))
-        # maxsize = (128, 32)
-        for imgpath, sidx in spriteList.items():
-            img = Image.open(imgpath)
-            x = (sidx % 2) * 128
-            y = floor(sidx / 2) * 32
-            # no resizing needed
-            base.paste(img, (x, y))
-    elif spriteType == "fruittrees":
-        imgWidth = 432
-        imgHeight = 80 * len(spriteList)
-        base = Image.new("RGBA", (imgWidth, imgHeight))
-        for imgpath, sidx in spriteList.items():
-            img = Image.open(imgpath)
-            x = 0
-            y = 80 * sidx
-            base.paste(img, (x, y))
-    elif spriteType == "weapons":
-        imgWidth = 128
-        imgHeight = ceil(len(spriteList) / 8) * 16
-        base = Image.new("RGBA", (imgWidth, imgHeight))
-        for imgpath, sidx in spriteList.items():
-            img = Image.open(imgpath)
-            x = (sidx % 8) * 16
-            y = floor(sidx / 8) * 16
-            base.paste(img, (x, y))
-    elif spriteType == "bigobjects":
-        imgHeight = ceil(len(spriteList) / 8) * 32
-        imgWidth = 128
+    """Stitches together sprites, returns the most decoded sprites held in memory at once."""
+    outPath = "{}{}.png".format(dstDir, fileName)
+    if isinstance(spriteList, SpriteStream):
+        spriteList.save(outPath)
+        return spriteList.compositor.peak
+    sheetHash = MANIFEST.sheetHash(spriteList, spriteType)
+    if MANIFEST.sheetCurrent(outPath, sheetHash):
+        print("{} unchanged, skipping".format(outPath))
+        return 0
+    columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+    imgWidth = columns * tileWidth
+    tileCount = max(spriteList.values()) + 1 if spriteList else 0
+    imgHeight = ceil(tileCount / columns) * tileHeight
+    tiles = MANIFEST.sheetTiles(spriteList)
+    previous = MANIFEST.previousSheet(outPath)
+    compositor = SpriteCompositor()
+    updated = None
+    if tiles is not None and previous is not None:
+        updated = updateAtlas(outPath, (imgWidth, imgHeight), spriteList, spriteType, tiles, previous, compositor)
+    if updated is None:
         base = Image.new("RGBA", (imgWidth, imgHeight))
-        for imgpath, sidx in spriteList.items():
-            img = Image.open(imgpath)
-            x = (sidx % 8) * 16
-            y = floor(sidx / 8) * 32
-            base.paste(img, (x, y))
+        compositor = SpriteCompositor()
+        compositor.paste(base, spriteList, spriteType)
+    else:
+        base, changedTiles = updated
+        if not changedTiles:
+            print("{} tiles unchanged, skipping".format(outPath))
+            MANIFEST.recordSheet(outPath, sheetHash, tiles)
+            return compositor.peak
+        print("{}: {} of {} tiles updated in place".format(outPath, changedTiles, len(tiles)))
     # base.show()
-    outPath = "{}{}.png".format(dstDir, fileName)
-    base.save(outPath)
+    savePng(base, outPath)
+    MANIFEST.recordSheet(outPath, sheetHash, tiles, compositor.overflow)
+    return compositor.peak
 
 
-def buildTrees(srcDir, modId, objectData, objectSprites, i18n, spritesheet):
+@profiled()
+def buildTrees(srcDir, modId, objectData, objectSprites, i18n, spritesheet, vanillaIndex):
     """Creates Data/fruitTrees entries from JA Trees."""
-    treeDir = "{}FruitTrees".format(srcDir)
     newTrees = {"LogName": "Raffadax New Trees",
                 "Action": "EditData",
                 "Target": "Data/fruitTrees",
-                "Entries": {}}
+                "Entries": newEntries()}
     treeTexture = {"LogName": "Raffadax Tree Textures",
                    "Action": "Load",
                    "Target": "Mods/{}/Trees".format(modId),
                    "FromFile": "assets/textures/fruittrees.png"}
-    jsonFiles = []
-    treeSprites = {}
-    i = len(objectSprites)
+    treeSprites = newSprites("fruittrees")
+    # seeds & saplings follow every object tile, including blank ones whose sprite is missing
+    i = max(len(objectSprites), len(SOURCES.items(srcDir, "Objects")))
     j = 0
-    for entry in objectscan(treeDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
-    for jf in jsonFiles:
-        data = pyjson5.load(open(jf, encoding="utf-8"))
-        # sapling object
-        saplingObj = SVObject()
-        nameStr = re.sub(NAMERE, "", data["SaplingName"])
-        saplingObj.Name = "{}_{}".format(modId, nameStr)
-        i18n["en"]["{}.Displayname".format(nameStr)] = data["SaplingName"]
-        saplingObj.Displayname = "{{{{i18n:{}.Displayname}}}}".format(nameStr)
-        # build the description.
-        i18n["en"]["{}.Description".format(nameStr)] = data["SaplingDescription"]
-        saplingObj.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
-        saplingObj.Type = "Seeds"
-        saplingObj.Category = -74
-        if "SaplingPurchasePrice" in data:
-            saplingObj.Price = data["SaplingPurchasePrice"]
-        saplingObj.Texture = "Mods/{}/Objects/FruitTrees".format(modId)
-        saplingObj.SpriteIndex = i
-        spritename = jf.rsplit("/", 1)[0] + "/sapling.png"
-        if "SaplingNameLocalization" in data:
-            for langKey, langStr in data["NameLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Displayname".format(nameStr)] = langStr
-        if "SaplingDescriptionLocalization" in data:
-            for langKey, langStr in data["DescriptionLocalization"]:
-                if langKey not in i18n:
-                    i18n[langKey] = {}
-                i18n[langKey]["{}.Description".format(nameStr)] = langStr
-        objectSprites[spritename] = saplingObj.SpriteIndex
-        objectData["Entries"][saplingObj.Name] = saplingObj.to_dict()
-
-        # tree object
-        newTree = FruitTree()
-        newTree.DisplayName = "{{{{i18n: {}.TreeName}}}}".format(nameStr)
-        i18n["en"]["{}.TreeName"] = data["Name"]
-        newTree.Seasons = [data["Season"]]
-        fruitName = re.sub(NAMERE, "", data["Product"])
-        fruit = {"ItemId": "{}_{}".format(modId, fruitName)}
-        newTree.Fruit.append(fruit)
-        newTree.Texture = "Mods/{}/Trees".format(modId)
-        newTree.TextureSpriteRow = j
-        treespritename = jf.rsplit("/", 1)[0] + "/tree.png"
-        treeSprites[treespritename] = newTree.TextureSpriteRow
-        newTrees["Entries"][saplingObj.Name] = newTree.to_dict()
+    DOCS.preload(MANIFEST.stale(SOURCES.jsonPaths(srcDir, "FruitTrees")))
+    for item in SOURCES.items(srcDir, "FruitTrees"):
+        result = convertCached("trees", item.jsonPath, [modId, i, j], convertTree, modId, i, j, vanillaIndex)
+        addEntries(objectData, result["Objects"])
+        addEntries(newTrees, result["Entries"])
+        mergeI18n(i18n, result["i18n"])
+        if "Sapling" in item.sprites:
+            objectSprites[item.sprites["Sapling"]] = i
+        if "Tree" in item.sprites:
+            treeSprites[item.sprites["Tree"]] = j
         i += 1
         j += 1
 
     return [objectData, newTrees, treeSprites, objectSprites, i18n, treeTexture]
 
 
+@profiled()
 def buildWeapons(srcDir, modId, spritesheet, i18n):
     """Creates Data/Weapons entries from JA Weapons."""
-    weaponDir = "{}Weapons".format(srcDir)
     newWeapons = {"LogName": "Raffadax New Weapons",
                   "Action": "EditData",
                   "Target": "Data/Weapons",
-                  "Entries": {}}
+                  "Entries": newEntries()}
     weaponTexture = {"LogName": "Raffadax Tree Textures",
                      "Action": "Load",
                      "Target": "Mods/{}/Weapons".format(modId),
                      "FromFile": "assets/textures/weaponobjects.png"}
-    jsonFiles = []
-    weaponSprites = {}
-    weaponTypes = {"Sword": 0, "Dagger": 1, "Club": 2}
+    weaponSprites = newSprites("weapons")
     i = 0
-    for entry in objectscan(weaponDir):
-        jsonFiles.append(entry.path.replace("\\", "/"))
-    for jf in jsonFiles:
-        data = pyjson5.load(open(jf, encoding="utf-8"))
-        # sapling object
-        nameNoDiacritics = jf.rsplit("/", 2)[1]  # not sure if the game will be happy with UTF-8 items, let's take it to ascii
-        newMW = MeleeWeapon()
-        nameStr = re.sub(NAMERE, "", nameNoDiacritics)
-        newMW.Name = "{}_{}".format(modId, nameStr)
-        i18n["en"]["{}.Displayname".format(nameStr)] = data["Name"]
-        newMW.DisplayName = "{{{{i18n:{}.Displayname}}}}".format(nameStr)
-        i18n["en"]["{}.Description".format(nameStr)] = data["Description"]
-        newMW.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
-        newMW.Type = weaponTypes[data["Type"]]
-        newMW.Texture = "Mods/{}/Weapons".format(modId)
-        newMW.SpriteIndex = i
-        if "MinimumDamage" in data:
-            newMW.MinDamage = data["MinimumDamage"]
-        if "MaximumDamage" in data:
-            newMW.MaxDamage = data["MaximumDamage"]
-        if "Knockback" in data:
-            newMW.Knockback = float(data["Knockback"])
-        if "Speed" in data:
-            newMW.Speed = int(data["Speed"])
-        if "Accuracy" in data:
-            newMW.Precision = int(data["Accuracy"])
-        if "Defense" in data:
-            newMW.Defense = int(data["Defense"])
-        if "ExtraSwingArea" in data:
-            newMW.AreaOfEffect = int(data["ExtraSwingArea"])
-        if "CritChance" in data:
-            newMW.CritChance = float(data["CritChance"])
-        if "CritMultiplier" in data:
-            newMW.CritMultiplier = float(data["CritMultiplier"])
-        if "MineDropVar" in data:
-            newMW.MineBaseLevel = int(data["MineDropVar"])
-        if "MineDropMinimumLevel" in data:
-            newMW.MineMinLevel = int(data["MineDropMinimumLevel"])
-        spritename = jf.rsplit("/", 1)[0] + "/weapon.png"
-        weaponSprites[spritename] = newMW.SpriteIndex
-        newWeapons["Entries"][newMW.Name] = newMW.to_dict()
+    DOCS.preload(MANIFEST.stale(SOURCES.jsonPaths(srcDir, "Weapons")))
+    for item in SOURCES.items(srcDir, "Weapons"):
+        result = convertCached("weapons", item.jsonPath, [modId, i], convertWeapon, item.jsonPath, modId, i)
+        addEntries(newWeapons, result["Entries"])
+        mergeI18n(i18n, result["i18n"])
+        if "Weapon" in item.sprites:
+            weaponSprites[item.sprites["Weapon"]] = i
         i += 1
 
     return [newWeapons, weaponSprites, i18n, weaponTexture]
 
 
-def objectscan(path):
-    """Recursive Scans of a JA modpack, returns json filepaths."""
-    for entry in os.scandir(path):
-        if entry.is_dir(follow_symlinks=False):
-            yield from objectscan(entry.path)
-        elif entry.name.endswith((".json")):
-            yield entry
+@profiled("gifts")
+def consolidateGiftTastes(giftPatches):
+    """Merges NPCGiftTastes patches into one per When condition, with a single Append per NPC & tier."""
+    groups = {}
+    opCount = 0
+    for patch in giftPatches:
+        condition = json.dumps(patch.get("When"), sort_keys=True)
+        if condition not in groups:
+            groups[condition] = {"Modes": [], "When": patch.get("When"), "Operations": {}}
+        group = groups[condition]
+        mode = patch["LogName"].rsplit(" - ", 1)[-1]
+        if mode not in group["Modes"]:
+            group["Modes"].append(mode)
+        for op in patch["TextOperations"]:
+            opCount += 1
+            if op["Operation"] != "Append":
+                group["Operations"][len(group["Operations"])] = op
+                continue
+            opKey = json.dumps([op["Target"], op["Delimiter"]])
+            if opKey not in group["Operations"]:
+                group["Operations"][opKey] = dict(op, Value={})
+            # an ordered dict of item IDs, an item appended twice to the same tier does nothing the second time
+            for value in op["Value"].split(op["Delimiter"]):
+                if value:
+                    group["Operations"][opKey]["Value"][value] = None
+    merged = []
+    # unconditional tastes first, then one patch per HasMod owner
+    for group in sorted(groups.values(), key=lambda group: group["When"] is not None):
+        if not group["Operations"]:
+            continue
+        patch = {"LogName": "Raffadax Gift Taste Edit - {}".format(", ".join(group["Modes"])),
+                 "Action": "EditData",
+                 "Target": "Data/NPCGiftTastes",
+                 "TextOperations": []}
+        for op in group["Operations"].values():
+            if op["Operation"] == "Append":
+                op = dict(op, Value=op["Delimiter"].join(op["Value"]))
+            patch["TextOperations"].append(op)
+        if group["When"] is not None:
+            patch["LogName"] += " ({})".format(", ".join("{}: {}".format(k, v) for k, v in group["When"].items()))
+            patch["When"] = group["When"]
+        merged.append(patch)
+    mergedOps = sum(len(patch["TextOperations"]) for patch in merged)
+    print("Gift tastes: {} patches with {} operations merged into {} with {}, {} patches & {} operations removed".format(
+        len(giftPatches), opCount, len(merged), mergedOps, len(giftPatches) - len(merged), opCount - mergedOps))
+    return merged
+
+
+def consolidatePatches(changes):
+    """Merges EditData patches with the same Target & When into the first of them, reporting entry keys set twice."""
+    merged = []
+    groups = {}
+    collisions = []
+    for patch in changes:
+        if patch["Action"] != "EditData" or "Entries" not in patch or set(patch) - PATCHMERGEKEYS:
+            merged.append(patch)
+            continue
+        groupKey = json.dumps([patch["Target"], patch.get("When")], sort_keys=True)
+        if groupKey not in groups:
+            groups[groupKey] = dict(patch, Entries=dict(patch["Entries"]))
+            merged.append(groups[groupKey])
+            continue
+        group = groups[groupKey]
+        for k, v in patch["Entries"].items():
+            if k in group["Entries"] and group["Entries"][k] != v:
+                collisions.append("{} entry {} ({} & {})".format(patch["Target"], k, group["LogName"], patch["LogName"]))
+            # the later patch won when they were separate, so it still does
+            group["Entries"][k] = v
+        group["LogName"] = "{} + {}".format(group["LogName"], patch["LogName"])
+    for collision in collisions:
+        print("Duplicate key: {}".format(collision))
+    print("Patches: {} before merging, {} after".format(len(changes), len(merged)))
+    return merged
+
+
+@profiled("convert")
+def convertBigObject(objData, modId, mode, i):
+    """Converts a single JA big craftable, returns its entry and i18n strings."""
+    i18n = {"en": {}}
+    bo = BigObject()
+    nameStr = re.sub(NAMERE, "", objData["Name"])
+    bo.Name = "{}_{}".format(modId, nameStr)
+    bo.DisplayName = "{{{{i18n:{}.DisplayName}}}}".format(nameStr)
+    i18n["en"]["{}.DisplayName".format(nameStr)] = objData["Name"]
+    bo.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
+    i18n["en"]["{}.Description".format(nameStr)] = objData["Description"]
+    if "Price" in objData:
+        bo.Price = objData["Price"]
+    if "ProvidesLight" in objData and objData["ProvidesLight"]:
+        bo.IsLamp = True
+    bo.Texture = "Mods/{}/BigObjects/{}".format(modId, mode)
+    bo.SpriteIndex = i
+    if "NameLocalization" in objData:
+        for langKey, langStr in objData["NameLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.DisplayName".format(nameStr)] = langStr
+    if "DescriptionLocalization" in objData:
+        for langKey, langStr in objData["DescriptionLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.Description".format(nameStr)] = langStr
+    return {"Entries": {bo.Name: bo.to_dict()}, "i18n": i18n}
+
+
+def convertCached(kind, jf, context, convert, *args):
+    """Runs convert over jf's json unless the manifest holds a result for the same file & context."""
+    if PROFILER is not None:
+        start = time.perf_counter()
+    result = MANIFEST.lookup(kind, jf, context)
+    if result is None:
+        result = convert(DOCS.load(jf), *args)
+        MANIFEST.record(kind, jf, context, result)
+    if PROFILER is not None:
+        PROFILER.addFile(jf, time.perf_counter() - start)
+    return result
+
+
+@profiled("convert")
+def convertCookingRecipe(objData, modId, vanillaIndex):
+    """Converts the Recipe field of a single JA object to a cooking recipe, if it has one."""
+    entries = {}
+    if "Recipe" in objData and objData["Recipe"] and (objData["Category"] == "Cooking" or objData["Category"] == -7):
+        output = "{}_{} {}".format(modId, objData["Name"].replace(" ", ""), objData["Recipe"]["ResultCount"])
+        ingredients = []
+        for iNode in objData["Recipe"]["Ingredients"]:
+            if isinstance(iNode["Object"], int) or iNode['Object'].isnumeric():
+                iStr = "{} {}".format(iNode['Object'], iNode["Count"])
+            elif iNode["Object"] in vanillaIndex:
+                iStr = "{} {}".format(vanillaIndex.resolve(iNode["Object"]), iNode["Count"])
+            else:
+                nameStr = re.sub(NAMERE, "", iNode["Object"])
+                iStr = "{}_{} {}".format(modId, nameStr, iNode["Count"])
+            ingredients.append(iStr)
+        entries[objData["Name"]] = "{}//{}/none/{}".format(" ".join(ingredients), output, objData["Name"])
+    return {"Entries": entries}
+
+
+@profiled("convert")
+def convertCraftingRecipe(objData, jf, modId, vanillaIndex):
+    """Converts the Recipe field of a single JA object or big craftable to a crafting recipe, if it has one."""
+    entries = {}
+    if "Recipe" in objData and objData["Recipe"] and (("Category" in objData and objData["Category"] == "Crafting") or jf.endswith("big-craftable.json")):
+        output = "{}_{} {}".format(modId, objData["Name"].replace(" ", ""), objData["Recipe"]["ResultCount"])
+        ingredients = []
+        isBC = "false"
+        if jf.endswith("big-craftable.json"):
+            isBC = "true"
+        for iNode in objData["Recipe"]["Ingredients"]:
+            if isinstance(iNode["Object"], int) or iNode['Object'].isnumeric():
+                iStr = "{} {}".format(iNode['Object'], iNode["Count"])
+            elif iNode["Object"] in vanillaIndex:
+                iStr = "{} {}".format(vanillaIndex.resolve(iNode["Object"]), iNode["Count"])
+            else:
+                nameStr = re.sub(NAMERE, "", iNode["Object"])
+                iStr = "{}_{} {}".format(modId, nameStr, iNode["Count"])
+            ingredients.append(iStr)
+        entries[objData["Name"]] = "{}//{}/{}/none/{}".format(" ".join(ingredients), output, isBC, objData["Name"])
+    return {"Entries": entries}
+
+
+@profiled("convert")
+def convertCrop(data, modId, i, j, vanillaIndex):
+    """Converts a single JA crop, returns its seed object, crop entry and i18n strings."""
+    i18n = {"en": {}}
+    # seed object
+    seedObj = SVObject()
+    nameStr = re.sub(NAMERE, "", data["SeedName"])
+    seedObj.Name = "{}_{}".format(modId, nameStr)
+    i18n["en"]["{}.Displayname".format(nameStr)] = data["SeedName"]
+    seedObj.DisplayName = "{{{{i18n: {}.Displayname}}}}".format(nameStr)
+    # build the description.
+    i18n["en"]["{}.Description".format(nameStr)] = data["SeedDescription"]
+    seedObj.Description = "{{{{i18n: {}.Description}}}}".format(nameStr)
+    seedObj.Type = "Seeds"
+    seedObj.Category = -74
+    if "SeedPurchasePrice" in data:
+        seedObj.Price = data["SeedPurchasePrice"]
+    seedObj.Texture = "Mods/{}/Objects/Crops".format(modId)
+    seedObj.SpriteIndex = i
+    if "SeedNameLocalization" in data:
+        for langKey, langStr in data["SeedNameLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.Displayname".format(nameStr)] = langStr
+    if "SeedDescriptionLocalization" in data:
+        for langKey, langStr in data["SeedDescriptionLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.Description".format(nameStr)] = langStr
+
+    # crop object
+    cropObj = Crop()
+    cropObj.Seasons = data["Seasons"]
+    cropObj.DaysInPhase = data["Phases"]
+    cropName = re.sub(NAMERE, "", data["Product"])
+    cropObj.HarvestItemID = vanillaIndex.resolve(data["Product"])
+    if cropObj.HarvestItemID is None:
+        cropObj.HarvestItemID = "{}_{}".format(modId, cropName)
+    cropObj.Texture = "Mods/{}/Crops".format(modId)
+    if "RegrowthPhase" in data:
+        cropObj.RegrowDays = data["RegrowthPhase"]
+    if "TrellisCrop" in data:
+        cropObj.IsRaised = data["TrellisCrop"]
+    if "HarvestWithScythe" in data and data["HarvestWithScythe"]:
+        cropObj.HarvestMethod = "Scythe"
+    if "Bonus" in data:
+        if "MinimumPerHarvest" in data["Bonus"]:
+            cropObj.HarvestMinStack = data["Bonus"]["MinimumPerHarvest"]
+        if "MaximumPerHarvest" in data["Bonus"]:
+            cropObj.HarvestMaxStack = data["Bonus"]["MinimumPerHarvest"]
+        if "MaxIncreasePerFarmLevel" in data["Bonus"]:
+            cropObj.HarvestMaxIncreasePerFarmingLevel = data["Bonus"]["MaxIncreasePerFarmLevel"]
+        if "ExtraChance" in data["Bonus"]:
+            cropObj.ExtraHarvestChance = data["Bonus"]["ExtraChance"]
+    if "Colors" in data and data["Colors"]:
+        cropObj.TintColors = data["Colors"]
+    cropObj.SpriteIndex = j
+    if "CropType" in data and data["CropType"]:
+        if data["CropType"] == "Paddy":
+            cropObj.IsPaddyCrop = True
+        if data["CropType"] == "IndoorsOnly":
+            newRule = {"Id": "{}_Rule".format(seedObj.Name),
+                       "Result": "Deny",
+                       "Condition": "LOCATION_IS_OUTDOORS Here"}
+            cropObj.PlantableLocationRules.append(newRule)
+    return {"Objects": {seedObj.Name: seedObj.to_dict()},
+            "Entries": {seedObj.Name: cropObj.to_dict()},
+            "i18n": i18n}
+
+
+@profiled("convert")
+def convertObject(objData, modId, mode, i):
+    """Converts a single JA object, returns its entry, i18n strings & [npc, tier, item] gift tastes."""
+    i18n = {"en": {}}
+    gifts = []
+    tasteKeys = {"Love": 1, "Like": 3, "Neutral": 9, "Dislike": 5, "Hate": 7}
+    newObj = SVObject()
+    nameRe = r"[^a-zA-Z0-9_\.]"
+    nameStr = re.sub(nameRe, "", objData["Name"])
+    newObj.Name = "{}_{}".format(modId, nameStr)
+    newObj.DisplayName = "{{{{i18n:{}.DisplayName}}}}".format(nameStr)
+    i18n["en"]["{}.DisplayName".format(nameStr)] = objData["Name"]
+    if "Category" in objData:
+        if isinstance(objData["Category"], str):
+            if objData["Category"].strip("-").isnumeric():
+                newObj.Category = int(objData["Category"])
+                if str(objData["Category"]) in CATINDICES:
+                    newObj.Type = CATINDICES[str(objData["Category"])]
+                else:
+                    print("No Cat found for {}".format(objData["Category"]))
+            else:
+                newObj.Type = objData["Category"]
+                if newObj.Type in CATEGORIES:
+                    newObj.Category = CATEGORIES[newObj.Type]
+                else:
+                    print("No Cat found for {}".format(newObj.Type))
+        else:
+            newObj.Category = objData["Category"]
+            newObj.Type = CATINDICES[str(objData["Category"])]
+            # print("Non string cat for {}".format(newObj.Name))
+    else:
+        print("No Category data for {}".format(objData["Name"]))
+        quit()
+    if "Description" in objData:
+        newObj.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
+        i18n["en"]["{}.Description".format(nameStr)] = objData["Description"]
+    if "Price" in objData:
+        newObj.Price = objData["Price"]
+    newObj.Texture = "Mods/{}/Objects/{}".format(modId, mode)
+    newObj.SpriteIndex = i
+    if "Edibility" in objData:
+        newObj.Edibility = objData["Edibility"]
+    if "EdibleIsDrink" in objData:
+        newObj.IsDrink = objData["EdibleIsDrink"]
+    if "EdibleBuffs" in objData and objData["EdibleBuffs"]:
+        newBuff = Buff()
+        newBuff.Id = "{}_buff".format(newObj.Name)
+        for bk, bv in objData["EdibleBuffs"].items():
+            if bk in ["Farming", "Mining", "Foraging", "Luck", "Fishing"]:
+                setattr(newBuff, "{}Level".format(bk), bv)
+            else:
+                setattr(newBuff, bk, bv)
+        newObj.Buffs.append(newBuff.to_dict())
+    if "ContextTags" in objData:
+        newObj.ContextTags = list(objData["ContextTags"])  # cached docs are shared
+    if "CategoryTextOverride" in objData:  # this may have to become a CustomField
+        catName = re.sub(NAMERE, "", objData["CategoryTextOverride"])
+        newObj.ContextTags.append("category_{}".format(catName.lower()))
+    if "NameLocalization" in objData:
+        for langKey, langStr in objData["NameLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.DisplayName".format(nameStr)] = langStr
+    if "DescriptionLocalization" in objData:
+        for langKey, langStr in objData["DescriptionLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.Description".format(nameStr)] = langStr
+    if "GiftTastes" in objData:
+        for tk, tdata in objData["GiftTastes"].items():
+            fieldIndex = tasteKeys[tk]
+            for npc in tdata:
+                if npc not in VANILLANPCS and npc not in MODNPCS:
+                    print("Nonexistent NPC: {} in {}".format(npc, newObj.Name))
+                    quit()
+                gifts.append([npc, fieldIndex, newObj.Name])
+    return {"Entries": {newObj.Name: newObj.to_dict()}, "i18n": i18n, "Gifts": gifts}
+
+
+@profiled("convert")
+def convertTree(data, modId, i, j, vanillaIndex):
+    """Converts a single JA fruit tree, returns its sapling object, tree entry and i18n strings."""
+    i18n = {"en": {}}
+    # sapling object
+    saplingObj = SVObject()
+    nameStr = re.sub(NAMERE, "", data["SaplingName"])
+    saplingObj.Name = "{}_{}".format(modId, nameStr)
+    i18n["en"]["{}.Displayname".format(nameStr)] = data["SaplingName"]
+    saplingObj.DisplayName = "{{{{i18n:{}.Displayname}}}}".format(nameStr)
+    # build the description.
+    i18n["en"]["{}.Description".format(nameStr)] = data["SaplingDescription"]
+    saplingObj.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
+    saplingObj.Type = "Seeds"
+    saplingObj.Category = -74
+    if "SaplingPurchasePrice" in data:
+        saplingObj.Price = data["SaplingPurchasePrice"]
+    saplingObj.Texture = "Mods/{}/Objects/FruitTrees".format(modId)
+    saplingObj.SpriteIndex = i
+    if "SaplingNameLocalization" in data:
+        for langKey, langStr in data["SaplingNameLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.Displayname".format(nameStr)] = langStr
+    if "SaplingDescriptionLocalization" in data:
+        for langKey, langStr in data["SaplingDescriptionLocalization"].items():
+            if langKey not in i18n:
+                i18n[langKey] = {}
+            i18n[langKey]["{}.Description".format(nameStr)] = langStr
+
+    # tree object
+    newTree = FruitTree()
+    newTree.DisplayName = "{{{{i18n: {}.TreeName}}}}".format(nameStr)
+    i18n["en"]["{}.TreeName"] = data["Name"]
+    newTree.Seasons = [data["Season"]]
+    fruitName = re.sub(NAMERE, "", data["Product"])
+    fruit = {"ItemId": vanillaIndex.resolve(data["Product"])}
+    if fruit["ItemId"] is None:
+        fruit["ItemId"] = "{}_{}".format(modId, fruitName)
+    newTree.Fruit.append(fruit)
+    newTree.Texture = "Mods/{}/Trees".format(modId)
+    newTree.TextureSpriteRow = j
+    return {"Objects": {saplingObj.Name: saplingObj.to_dict()},
+            "Entries": {saplingObj.Name: newTree.to_dict()},
+            "i18n": i18n}
+
+
+@profiled("convert")
+def convertWeapon(data, jf, modId, i):
+    """Converts a single JA weapon, returns its entry and i18n strings."""
+    i18n = {"en": {}}
+    weaponTypes = {"Sword": 0, "Dagger": 1, "Club": 2}
+    nameNoDiacritics = jf.rsplit("/", 2)[1]  # not sure if the game will be happy with UTF-8 items, let's take it to ascii
+    newMW = MeleeWeapon()
+    nameStr = re.sub(NAMERE, "", nameNoDiacritics)
+    newMW.Name = "{}_{}".format(modId, nameStr)
+    i18n["en"]["{}.Displayname".format(nameStr)] = data["Name"]
+    newMW.DisplayName = "{{{{i18n:{}.Displayname}}}}".format(nameStr)
+    i18n["en"]["{}.Description".format(nameStr)] = data["Description"]
+    newMW.Description = "{{{{i18n:{}.Description}}}}".format(nameStr)
+    newMW.Type = weaponTypes[data["Type"]]
+    newMW.Texture = "Mods/{}/Weapons".format(modId)
+    newMW.SpriteIndex = i
+    if "MinimumDamage" in data:
+        newMW.MinDamage = data["MinimumDamage"]
+    if "MaximumDamage" in data:
+        newMW.MaxDamage = data["MaximumDamage"]
+    if "Knockback" in data:
+        newMW.Knockback = float(data["Knockback"])
+    if "Speed" in data:
+        newMW.Speed = int(data["Speed"])
+    if "Accuracy" in data:
+        newMW.Precision = int(data["Accuracy"])
+    if "Defense" in data:
+        newMW.Defense = int(data["Defense"])
+    if "ExtraSwingArea" in data:
+        newMW.AreaOfEffect = int(data["ExtraSwingArea"])
+    if "CritChance" in data:
+        newMW.CritChance = float(data["CritChance"])
+    if "CritMultiplier" in data:
+        newMW.CritMultiplier = float(data["CritMultiplier"])
+    if "MineDropVar" in data:
+        newMW.MineBaseLevel = int(data["MineDropVar"])
+    if "MineDropMinimumLevel" in data:
+        newMW.MineMinLevel = int(data["MineDropMinimumLevel"])
+    return {"Entries": {newMW.Name: newMW.to_dict()}, "i18n": i18n}
+
+
+def dedupeSprites(spriteList, patch, spriteType, field="SpriteIndex"):
+    """Collapses identical sprites onto one tile & rewrites the patch's sprite indices to match.
+
+    Every index an entry uses is remapped, entries whose sprite is missing share one blank tile.
+    """
+    items = sorted(spriteList.items(), key=lambda item: item[1])
+    with ThreadPoolExecutor(max_workers=SPRITETHREADS) as pool:
+        digests = list(pool.map(spriteDigest, [imgpath for imgpath, sidx in items]))
+    sprites = {}
+    for (imgpath, sidx), digest in zip(items, digests):
+        sprites.setdefault(sidx, []).append((imgpath, digest))
+    for entry in patch["Entries"].values():
+        if isinstance(entry.get(field), int) and entry[field] not in sprites:
+            sprites[entry[field]] = [(None, None)]  # a None digest is the blank tile, nothing is pasted on it
+    tiles = {}
+    remap = {}
+    newList = {}
+    for sidx in sorted(sprites):
+        for imgpath, digest in sprites[sidx]:
+            if digest not in tiles:
+                tiles[digest] = len(tiles)
+                if imgpath is not None:
+                    newList[imgpath] = tiles[digest]
+            remap[sidx] = tiles[digest]
+    for name, entry in patch["Entries"].items():
+        if entry.get(field) in remap:
+            # copy, the entry dict may be shared with the manifest's cached result
+            patch["Entries"][name] = dict(entry, **{field: remap[entry[field]]})
+    saved = len(remap) - len(tiles)
+    if saved:
+        columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+        print("Deduplicated {} sprites: {} tiles, {} bytes saved".format(
+            spriteType, saved, saved * tileWidth * tileHeight * 4))
+    return newList
+
+
+def discardSpools(values):
+    """Deletes the spool files among values once they have been written or merged."""
+    for value in values:
+        if isinstance(value, SpooledEntries):
+            value.discard()
+
+
+def initBatchWorker(vanillaIndex):
+    """Keeps the vanilla index in a --batch worker so it is sent once per process rather than per task."""
+    global VANILLAINDEX
+    VANILLAINDEX = vanillaIndex
 
 
-def writeData(textures: list, data: list, dstDir: str, dstName: str, cGifts=[]):
-    """Generates the json files and writes to drive."""
+def mergeI18n(i18n, fragment):
+    """Merges a converted item's i18n strings into the run's i18n dict."""
+    for langKey, langData in fragment.items():
+        if langKey not in i18n:
+            i18n[langKey] = newEntries()
+        i18n[langKey].update(langData)
+
+
+def mergeStageResults(results):
+    """Merges (stage, result) pairs in stage order, returns the combined i18n & reports keys claimed by two stages."""
+    i18n = {"en": newEntries()}
+    entryOwners = {}
+    i18nOwners = {}
+    collisions = []
+    for stage, result in results:
+        for target, keys in result["Keys"].items():
+            for k in keys:
+                owner = entryOwners.setdefault((target, k), stage)
+                if owner != stage:
+                    collisions.append("{} entry {} ({} & {})".format(target, k, owner, stage))
+        for langKey, langData in result["i18n"].items():
+            for k, v in langData.items():
+                # a hash is enough to tell the strings apart & keeps --stream from holding every one
+                owner, ownerHash = i18nOwners.setdefault((langKey, k), (stage, hash(v)))
+                if owner != stage and ownerHash != hash(v):
+                    collisions.append("i18n {} {} ({} & {})".format(langKey, k, owner, stage))
+        mergeI18n(i18n, result["i18n"])
+        discardSpools(result["i18n"].values())
+        if "Manifest" in result:
+            MANIFEST.merge(result["Manifest"])
+        if "Profile" in result and PROFILER is not None:
+            PROFILER.merge(result["Profile"])
+        if "Docs" in result:
+            DOCS.misses += result["Docs"][0]
+            DOCS.hits += result["Docs"][1]
+        if "Loader" in result:
+            JSONLOADER.merge(result["Loader"])
+    for collision in collisions:
+        print("Duplicate key: {}".format(collision))
+    return i18n
+
+
+def newEntries():
+    """An empty Entries or language dict, spooled to disk under --stream."""
+    return SpooledEntries() if STREAMING else {}
+
+
+def newSprites(spriteType):
+    """An empty sprite path to SpriteIndex dict, under --stream a sheet that pastes each sprite as it is added."""
+    return SpriteStream(spriteType) if STREAMING else {}
+
+
+def paletteColors(palImg):
+    """The rgb triples of a palette image's palette, in index order."""
+    palette = palImg.getpalette()
+    return [tuple(palette[n:n + 3]) for n in range(0, len(palette), 3)]
+
+
+def pageLayout(spriteType, tileCount):
+    """Returns the sheet type & tile capacity of the --max-texture-size pages for tileCount tiles.
+
+    WRAPPEDSHEETS widen up to the maximum width before spilling onto another page, each width registered as its
+    own SHEETLAYOUTS type. Crop & fruit tree sprites sit at fixed x offsets, so those sheets only get shorter.
+    """
+    columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+    maxWidth, maxHeight = MAXTEXTURE
+    rows = maxHeight // tileHeight
+    if spriteType not in WRAPPEDSHEETS:
+        return spriteType, columns * rows
+    pageColumns = max(1, min(maxWidth // tileWidth, max(columns, ceil(tileCount / rows))))
+    if pageColumns == columns:
+        return spriteType, columns * rows
+    pageType = "{}-{}".format(spriteType, pageColumns)
+    SHEETLAYOUTS.setdefault(pageType, (pageColumns, tileWidth, tileHeight))
+    return pageType, pageColumns * rows
+
+
+def pageSprites(spriteList, patch, texture, fileName, spriteType, field="SpriteIndex"):
+    """Splits a sheet into pages within --max-texture-size & points the patch's entries at their page's texture.
+
+    Returns the [spriteList, fileName, spriteType] of every page & one Load patch per page. The first page keeps
+    the sheet's name, later ones are numbered, e.g. crops-2.png is loaded to Mods/<ModId>/Crops-2.
+    """
+    if MAXTEXTURE is None:
+        return [[spriteList, fileName, spriteType]], [texture]
+    entries = [entry for entry in patch["Entries"].values() if entry.get("Texture") == texture["Target"] and field in entry]
+    tileCount = max(list(spriteList.values()) + [entry[field] for entry in entries], default=-1) + 1
+    pageType, perPage = pageLayout(spriteType, tileCount)
+    pages = [[{}, fileName, pageType]]
+    textures = [texture]
+    fromFile = os.path.splitext(texture["FromFile"])
+    for n in range(2, ceil(tileCount / perPage) + 1):
+        pages.append([{}, "{}-{}".format(fileName, n), pageType])
+        textures.append(dict(texture, LogName="{} - Page {}".format(texture["LogName"], n),
+                             Target="{}-{}".format(texture["Target"], n),
+                             FromFile="{}-{}{}".format(fromFile[0], n, fromFile[1])))
+    for imgpath, sidx in spriteList.items():
+        pages[sidx // perPage][0][imgpath] = sidx % perPage
+    for name, entry in patch["Entries"].items():
+        if entry.get("Texture") == texture["Target"] and entry.get(field, 0) >= perPage:
+            # copy, the entry dict may be shared with the manifest's cached result
+            patch["Entries"][name] = dict(entry, Texture=textures[entry[field] // perPage]["Target"],
+                                          **{field: entry[field] % perPage})
+    if len(pages) > 1:
+        print("{} split into {} pages of up to {} tiles".format(fileName, len(pages), perPage))
+    return pages, textures
+
+
+def quantizeExact(img):
+    """Converts an RGB image with at most 256 colours to a palette image without changing any pixel."""
+    # median cut splits until each colour has its own entry, & maps pixels onto them in C
+    return img.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+
+
+def readSource(path):
+    """readFile() for the json read-ahead, failures raise JsonDecodeError like decodeJson."""
+    try:
+        return readFile(path)
+    except OSError as e:
+        raise JsonDecodeError(path, e) from e
+
+
+def runArtisan(srcDir, dstDir, spriteDir, modId, vanillaIndex, dstName="artisan"):
+    """Converts a JA artisan pack: objects, big craftables & their recipes."""
+    print("Generating Artisan Data")
+    i18n = {"en": newEntries()}
+    objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(srcDir, modId, "artisanobjects", "Artisan", i18n)
+    bigObjectData, bigObjectSprites, i18n, bigObjTexture = buildBigObjects(srcDir, modId, "artisanmachines", "Artisan", i18n)
+    # recipes
+    cookingData = buildCooking(srcDir, modId, vanillaIndex)
+    craftingData = buildCrafting(srcDir, modId, vanillaIndex)
+    if DEDUPESPRITES:
+        objectSprites = dedupeSprites(objectSprites, objectData, "objects")
+        bigObjectSprites = dedupeSprites(bigObjectSprites, bigObjectData, "bigobjects")
+    objectPages, objTextures = pageSprites(objectSprites, objectData, objTexture, "artisanobjects", "objects")
+    bigObjectPages, bigObjTextures = pageSprites(bigObjectSprites, bigObjectData, bigObjTexture, "artisanmachines", "bigobjects")
+    changes = writeData(objTextures + bigObjTextures, [objectData, bigObjectData, cookingData, craftingData], dstDir, dstName, unmergedGifts(conditionalGifts))
+    buildPages(objectPages, spriteDir)
+    buildPages(bigObjectPages, spriteDir)
+    return stageResult(i18n, [objectData, bigObjectData, cookingData, craftingData], [giftData] + conditionalGifts, changes)
+
+
+def runBatch(mods, dstRoot, vanillaIndex, options, method=None):
+    """Converts several JA mods on one shared worker pool, each into its own [CP] folder, & reports item keys claimed by two mods."""
+    tasks = []
+    modDirs = []
+    for srcDir, modId, name in mods:
+        modDir = "{}[CP] {}/assets/".format(dstRoot, re.sub(r'[<>:"/\\|?*]', "", name))
+        if any(modDir == usedDir for usedName, usedDir in modDirs):
+            print("{} would overwrite the output of another mod named {}, skipping".format(srcDir, name))
+            continue
+        os.makedirs("{}textures".format(modDir), exist_ok=True)
+        stages = [method.lower()] if method and method.lower() in STAGES else batchStages(srcDir)
+        if not stages:
+            print("{} has nothing to convert, skipping".format(srcDir))
+            continue
+        modDirs.append((name, modDir))
+        tasks += [(name, modId, modDir, stage, srcDir) for stage in stages]
+    if not tasks:
+        return
+    # each task is one process already, a nested decode pool per task would oversubscribe
+    stageOptions = dict(options, jobs=1)
+    print("Converting {} mods as {} stages on {} workers".format(len(modDirs), len(tasks), min(options["jobs"], len(tasks))))
+    with ProcessPoolExecutor(max_workers=min(options["jobs"], len(tasks)), initializer=initBatchWorker, initargs=(vanillaIndex,)) as pool:
+        futures = [(modDir, stage, pool.submit(runBatchStage, stage, srcDir, modDir, "{}textures/".format(modDir), modId, stageOptions))
+                   for name, modId, modDir, stage, srcDir in tasks]
+        results = [(modDir, stage, future.result()) for modDir, stage, future in futures]
+    keyOwners = {}
+    collisions = []
+    for name, modDir in modDirs:
+        modResults = [(stage, result) for resultDir, stage, result in results if resultDir == modDir]
+        MANIFEST.open(modDir, "vanillaObjects.json", options["rebuild"])
+        writeLanguageData(mergeStageResults(modResults), modDir)
+        if MERGEGIFTS:
+            writeGiftTastes(modResults, modDir)
+        if MERGEPATCHES:
+            writePatches(modResults, modDir)
+        MANIFEST.save()
+        # one pass over every entry key, keyed by (Target, key) so a clash is a single dict probe
+        for stage, result in modResults:
+            for target, keys in result["Keys"].items():
+                for k in keys:
+                    owner = keyOwners.setdefault((target, k), name)
+                    if owner != name:
+                        collisions.append("{} entry {} ({} & {})".format(target, k, owner, name))
+    for collision in collisions:
+        print("Cross-mod collision: {}".format(collision))
+    print("{} entry keys across {} mods, {} cross-mod collisions".format(len(keyOwners), len(modDirs), len(collisions)))
+
+
+def runBatchStage(stage, srcDir, dstDir, spriteDir, modId, options):
+    """runStage for a --batch worker, using the vanilla index it was started with."""
+    return runStage(stage, srcDir, dstDir, spriteDir, modId, VANILLAINDEX, options)
+
+
+def runCrops(srcDir, dstDir, spriteDir, modId, vanillaIndex, dstName="crops"):
+    """Converts a JA crops pack: crop objects, seeds & Data/Crops."""
+    print("Generating Crop Data")
+    i18n = {"en": newEntries()}
+    # crop objects
+    objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(srcDir, modId, "cropobjects", "Crops", i18n)
+    # seed objects and cropdata
+    objectData, cropData, cropSprites, objectSprites, i18n, cropTexture = buildCrops(srcDir, modId, objectData, objectSprites, i18n, "cropobjects", vanillaIndex)
+    if DEDUPESPRITES:
+        objectSprites = dedupeSprites(objectSprites, objectData, "objects")
+        cropSprites = dedupeSprites(cropSprites, cropData, "crops")
+    objectPages, objTextures = pageSprites(objectSprites, objectData, objTexture, "cropobjects", "objects")
+    cropPages, cropTextures = pageSprites(cropSprites, cropData, cropTexture, "crops", "crops")
+    # write data to file
+    changes = writeData(objTextures + cropTextures, [objectData, cropData] + unmergedGifts([giftData]), dstDir, dstName, unmergedGifts(conditionalGifts))
+    # # make sprites
+    buildPages(objectPages, spriteDir)
+    buildPages(cropPages, spriteDir)
+    return stageResult(i18n, [objectData, cropData], [giftData] + conditionalGifts, changes)
+
+
+def runStage(stage, srcDir, dstDir, spriteDir, modId, vanillaIndex, options):
+    """Runs one aio stage in a worker process, returns its result & the manifest records it touched."""
+    applyOptions(options)
+    # pool workers can be handed several tasks, so counts & parsed docs start over for each
+    DOCS.docs = {}
+    DOCS.hits = DOCS.misses = 0
+    MANIFEST.reused = MANIFEST.converted = 0
+    MANIFEST.open(dstDir, "vanillaObjects.json", options["rebuild"])
+    result = STAGES[stage](srcDir, dstDir, spriteDir, modId, vanillaIndex)
+    result["Manifest"] = MANIFEST.changes()
+    result["Docs"] = [DOCS.misses, DOCS.hits]
+    result["Loader"] = JSONLOADER.changes()
+    if PROFILER is not None:
+        # the paths go back too, so a pack scanned by several workers counts its files once
+        result["Profile"] = dict(PROFILER.report(), Sources=sorted(PROFILER.sources))
+    SPRITECACHE.save()
+    SPRITECACHE.report()
+    return result
+
+
+def runTrees(srcDir, dstDir, spriteDir, modId, vanillaIndex, dstName="trees"):
+    """Converts a JA fruit tree pack: fruit objects, saplings & Data/fruitTrees."""
+    print("Generating Fruit Tree Data")
+    i18n = {"en": newEntries()}
+    # fruit objects
+    objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(srcDir, modId, "treeobjects", "FruitTrees", i18n)
+    objectData, treeData, treeSprites, objectSprites, i18n, treeTexture = buildTrees(srcDir, modId, objectData, objectSprites, i18n, "treeobjects", vanillaIndex)
+    if DEDUPESPRITES:
+        objectSprites = dedupeSprites(objectSprites, objectData, "objects")
+        treeSprites = dedupeSprites(treeSprites, treeData, "fruittrees", "TextureSpriteRow")
+    objectPages, objTextures = pageSprites(objectSprites, objectData, objTexture, "treeobjects", "objects")
+    treePages, treeTextures = pageSprites(treeSprites, treeData, treeTexture, "fruittrees", "fruittrees", "TextureSpriteRow")
+    changes = writeData(objTextures + treeTextures, [objectData, treeData] + unmergedGifts([giftData]), dstDir, dstName, unmergedGifts(conditionalGifts))
+    buildPages(objectPages, spriteDir)
+    buildPages(treePages, spriteDir)
+    return stageResult(i18n, [objectData, treeData], [giftData] + conditionalGifts, changes)
+
+
+def runWatch(stageRuns, dstDir, spriteDir, modId, vanillaIndex):
+    """Keeps converting until interrupted, re-running only the stages whose sources changed.
+
+    stageRuns holds [stage, srcDir, dstName, result] for each stage of the initial run. Unchanged items come
+    from the manifest & unchanged sheets are skipped, so a single edit only reconverts that item.
+    """
+    srcDirs = [srcDir for stage, srcDir, dstName, result in stageRuns]
+    snapshot = snapshotSources(srcDirs)
+    print("Watching {} for changes, Ctrl+C to stop".format(", ".join(srcDirs)))
+    try:
+        while True:
+            time.sleep(WATCHINTERVAL)
+            current = snapshotSources(srcDirs)
+            if current == snapshot:
+                continue
+            # editors often save in bursts, wait for the tree to settle before converting
+            while True:
+                time.sleep(WATCHDEBOUNCE)
+                settled = snapshotSources(srcDirs)
+                if settled == current:
+                    break
+                current = settled
+            start = time.perf_counter()
+            changed = [path for path in set(snapshot) | set(current) if snapshot.get(path) != current.get(path)]
+            snapshot = current
+            DOCS.forget(changed)
+            MANIFEST.forget(changed)
+            SOURCES.forget(changed)
+            changedKeys = [DOCS.key(path) for path in changed]
+            try:
+                for stageRun in stageRuns:
+                    stage, srcDir, dstName = stageRun[:3]
+                    if any(changedKey.startswith(DOCS.key(srcDir)) for changedKey in changedKeys):
+                        stageRun[3] = STAGES[stage](srcDir, dstDir, spriteDir, modId, vanillaIndex, dstName)
+            except Exception as e:
+                # a half-written json is normal mid-edit, the next save retries it
+                print("Conversion failed, waiting for the next change: {}".format(e))
+                continue
+            writeLanguageData(mergeStageResults([(stageRun[0], stageRun[3]) for stageRun in stageRuns]), dstDir)
+            if MERGEGIFTS:
+                writeGiftTastes([(stageRun[0], stageRun[3]) for stageRun in stageRuns], dstDir)
+            if MERGEPATCHES:
+                writePatches([(stageRun[0], stageRun[3]) for stageRun in stageRuns], dstDir)
+            MANIFEST.save()
+            print("{} changed files converted in {:.2f}s".format(len(changed), time.perf_counter() - start))
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def runWeapons(srcDir, dstDir, spriteDir, modId, vanillaIndex, dstName="weapons"):
+    """Converts a JA weapons pack to Data/Weapons."""
+    print("Generating Weapon Data")
+    i18n = {"en": newEntries()}
+    weaponData, weaponSprites, i18n, weaponTexture = buildWeapons(srcDir, modId, "weaponobjects", i18n)
+    if DEDUPESPRITES:
+        weaponSprites = dedupeSprites(weaponSprites, weaponData, "weapons")
+    weaponPages, weaponTextures = pageSprites(weaponSprites, weaponData, weaponTexture, "weaponobjects", "weapons")
+    changes = writeData(weaponTextures, [weaponData], dstDir, dstName)
+    buildPages(weaponPages, spriteDir)
+    return stageResult(i18n, [weaponData], [], changes)
+
+
+@profiled("encode")
+def savePng(base, outPath, profile=None):
+    """Encodes a spritesheet with a PNGPROFILES profile & logs its encode time and size."""
+    profile = profile or PNGPROFILE
+    start = time.perf_counter()
+    colors = base.getcolors(256) if profile == "release" else None
+    if colors is not None:
+        base = toPalette(base, colors)
+    base.save(outPath, **PNGPROFILES[profile])
+    if PROFILER is not None:
+        PROFILER.count("BytesWritten", os.path.getsize(outPath))
+    print("{} written: {} bytes in {:.2f}s ({})".format(
+        outPath, os.path.getsize(outPath), time.perf_counter() - start, profile))
+
+
+def snapshotSources(srcDirs):
+    """Returns (mtime, size) of every file under the WATCHFOLDERS of srcDirs."""
+    snapshot = {}
+    todo = ["{}{}".format(srcDir, folder) for srcDir in srcDirs for folder in WATCHFOLDERS]
+    while todo:
+        try:
+            entries = list(os.scandir(todo.pop()))
+        except OSError:
+            continue  # folder not in this pack, or removed mid-scan
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                todo.append(entry.path)
+            else:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path.replace("\\", "/")] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def spriteDigest(imgpath):
+    """Hashes a sprite's decoded pixels, so identical art saved differently still matches."""
+    if SPRITECACHE.enabled:
+        img = SPRITECACHE.load(imgpath)
+    else:
+        with Image.open(imgpath) as src:
+            img = src.convert("RGBA")
+    digest = hashlib.sha1("{}x{}".format(*img.size).encode("utf-8"))
+    digest.update(img.tobytes())
+    img.close()
+    return digest.hexdigest()
+
+
+def stageResult(i18n, patches, gifts=[], changes=[]):
+    """Packs a stage's i18n, the entry keys of each EditData patch it wrote, its gift taste patches & every patch it wrote."""
+    keys = {}
+    for patch in patches:
+        keys.setdefault(patch["Target"], []).extend(patch["Entries"].keys())
+    return {"i18n": i18n, "Keys": keys, "Gifts": gifts, "Changes": changes}
+
+
+def streamJson(f, value, indent=None, level=0, depth=4):
+    """Writes value to f one container item at a time, the output matches json.dumps(value, indent=indent).
+
+    depth 4 streams down to each item of a patch's Entries or TextOperations.
+    """
+    if isinstance(value, SpooledEntries) and not value:
+        value = {}
+    if depth and isinstance(value, (dict, list, SpooledEntries)) and value:
+        if indent is None:
+            inner = outer = ""
+            keySep = ":"
+        else:
+            inner = "\n" + " " * (indent * (level + 1))
+            outer = "\n" + " " * (indent * level)
+            keySep = ": "
+        isDict = not isinstance(value, list)
+        f.write("{" if isDict else "[")
+        for n, item in enumerate(value.items() if isDict else value):
+            f.write(inner if n == 0 else "," + inner)
+            if isDict:
+                f.write(json.dumps(item[0]) + keySep)
+                item = item[1]
+            streamJson(f, item, indent, level + 1, depth - 1)
+        f.write(outer + ("}" if isDict else "]"))
+    elif indent is None:
+        f.write(json.dumps(value, separators=(",", ":")))
+    else:
+        f.write(json.dumps(value, indent=indent).replace("\n", "\n" + " " * (indent * level)))
+
+
+def streamStrings(pairs, indent=None):
+    """Yields json.dumps(dict(pairs), indent=indent, ensure_ascii=False) a pair at a time, for i18n string tables."""
+    if indent is None:
+        first, sep, last = "{", ", ", "}"
+    else:
+        first, sep, last = "{\n" + " " * indent, ",\n" + " " * indent, "\n}"
+    n = 0
+    for n, (k, v) in enumerate(pairs, 1):
+        yield (first if n == 1 else sep) + json.dumps(k, ensure_ascii=False) + ": " + json.dumps(v, ensure_ascii=False)
+    yield last if n else "{}"
+
+
+def textureSize(value):
+    """Parses a --max-texture-size of WIDTHxHEIGHT or a single size for both."""
+    try:
+        size = tuple(int(n) for n in value.lower().split("x"))
+    except ValueError:
+        size = ()
+    if len(size) == 1:
+        size = size * 2
+    if len(size) != 2:
+        raise argparse.ArgumentTypeError("expected WIDTHxHEIGHT or a single size, got {}".format(value))
+    # a row of a fixed width sheet can't be split, nor can any tile
+    minWidth = max(columns * tileWidth for spriteType, (columns, tileWidth, tileHeight) in SHEETLAYOUTS.items() if spriteType not in WRAPPEDSHEETS)
+    minHeight = max(tileHeight for columns, tileWidth, tileHeight in SHEETLAYOUTS.values())
+    if size[0] < minWidth or size[1] < minHeight:
+        raise argparse.ArgumentTypeError("must be at least {}x{}, the size of a fruit tree row".format(minWidth, minHeight))
+    return size
+
+
+def tilePosition(spriteType, sidx):
+    """Returns the top left pixel of tile sidx in a spritesheet of spriteType."""
+    columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+    return ((sidx % columns) * tileWidth, floor(sidx / columns) * tileHeight)
+
+
+def toPalette(base, colors):
+    """Losslessly converts an RGBA image to a palette image with an RGBA palette, colors is its getcolors(256)."""
+    alphas = {}
+    for count, color in colors:
+        alphas.setdefault(color[:3], []).append(color[3])
+    palImg = quantizeExact(base.convert("RGB"))
+    rgbs = paletteColors(palImg)
+    if all(len(rgbAlphas) == 1 for rgbAlphas in alphas.values()):
+        palColors = [rgb + tuple(alphas.get(rgb, [255])[:1]) for rgb in rgbs]
+    else:
+        # some colours differ only in alpha, so each pixel's (rgb entry, alpha) pair is quantized as well
+        keys = Image.merge("RGB", [Image.frombytes("L", base.size, palImg.tobytes()), base.getchannel("A"), Image.new("L", base.size)])
+        palImg = quantizeExact(keys)
+        palColors = [rgbs[rgbEntry] + (alpha,) for rgbEntry, alpha, zero in paletteColors(palImg)]
+    palImg.putpalette(b"".join(bytes(color) for color in palColors), rawmode="RGBA")
+    return palImg
+
+
+def unmergedGifts(giftPatches):
+    """The gift taste patches a stage writes into its own data json, none with --merge-gifts."""
+    return [] if MERGEGIFTS else giftPatches
+
+
+def updateAtlas(outPath, size, spriteList, spriteType, tiles, previous, compositor):
+    """Starts from the last build of a sheet & repastes only tiles whose sprites changed.
+
+    Returns (base, changed tile count), or None when the sheet has to be rebuilt from scratch because
+    the old file is unreadable or a sprite overflows its tile onto a neighbour.
+    """
+    if previous["Overflow"]:
+        return None
+    try:
+        with Image.open(outPath) as old:
+            oldSheet = old.convert("RGBA")
+    except OSError:
+        return None
+    if oldSheet.width != size[0]:
+        # a --max-texture-size page of another width has every tile in another place
+        oldSheet.close()
+        return None
+    # tile positions only depend on the column count, so a taller or shorter sheet keeps every old tile in place
+    base = Image.new("RGBA", size)
+    base.paste(oldSheet, (0, 0))
+    oldSheet.close()
+    changed = {sidx for sidx in set(tiles) | set(previous["Tiles"]) if tiles.get(sidx) != previous["Tiles"].get(sidx)}
+    columns, tileWidth, tileHeight = SHEETLAYOUTS[spriteType]
+    blank = Image.new("RGBA", (tileWidth, tileHeight))
+    for sidx in changed:
+        base.paste(blank, tilePosition(spriteType, int(sidx)))
+    compositor.paste(base, {imgpath: sidx for imgpath, sidx in spriteList.items() if str(sidx) in changed}, spriteType)
+    if compositor.overflow:
+        return None
+    return base, len(changed)
+
+
+@profiled("write")
+def writeData(textures: list, data: list, dstDir: str, dstName: str, cGifts=[], defer=None):
+    """Generates the json files and writes to drive, returns the patches.
+
+    defer holds the patches for writePatches instead of writing them, it defaults to --merge-patches.
+    """
     jsonOut = {"Changes": []}
     jsonOut["Changes"] += textures
     jsonOut["Changes"] += data
     if cGifts:
         jsonOut["Changes"] += cGifts
+    if MERGEPATCHES if defer is None else defer:
+        return jsonOut["Changes"]
     outPath = "{}data/{}.json".format(dstDir, dstName)
-    outData = json.dumps(jsonOut, indent=4)
-    if not os.path.exists("{}data".format(dstDir)):
-        os.mkdir("{}data".format(dstDir))
-    with open(outPath, 'w') as f:
-        f.write(outData)
+    os.makedirs("{}data".format(dstDir), exist_ok=True)
+    with open(outPath, 'w', buffering=WRITEBUFFER) as f:
+        streamJson(f, jsonOut, JSONINDENT)
+        if PROFILER is not None:
+            PROFILER.count("BytesWritten", f.tell())
+    discardSpools(patch.get("Entries") for patch in jsonOut["Changes"])
     print("Content Patcher data written to {}".format(outPath))
+    return jsonOut["Changes"]
 
 
+def writeGiftTastes(results, dstDir):
+    """Writes the gift tastes of every (stage, result) as one consolidated data/gifttastes.json."""
+    if MERGEPATCHES:
+        return  # writePatches puts them in the merged file
+    giftPatches = [patch for stage, result in results for patch in result["Gifts"]]
+    writeData([], consolidateGiftTastes(giftPatches), dstDir, "gifttastes")
+
+
+@profiled("write")
 def writeLanguageData(i18n, dstDir):
-    """Generates i18n files and writes to drive."""
-    if not os.path.exists("{}i18n".format(dstDir)):
-        os.mkdir("{}i18n".format(dstDir))
-    for langKey, langData in i18n.items():
+    """Generates i18n files and writes to drive, one <lang>.json per language with English as default.json."""
+    os.makedirs("{}i18n".format(dstDir), exist_ok=True)
+    default = i18n.get(DEFAULTLANGUAGE, {})
+    with ThreadPoolExecutor(max_workers=SPRITETHREADS) as pool:
+        results = list(pool.map(lambda lang: writeLanguageFile(dstDir, lang[0], lang[1], default), i18n.items()))
+    for langKey, keyCount, dropped, written in results:
+        print("i18n {}: {} keys{}, {}".format(langKey, keyCount, ", {} same as {} dropped".format(dropped, DEFAULTLANGUAGE) if dropped else "",
+                                              "written" if written else "unchanged"))
+    discardSpools(i18n.values())
+    print("i18n data written to {}".format("{}i18n".format(dstDir)))
+
+
+def writeLanguageFile(dstDir, langKey, langData, default):
+    """Writes one language's i18n file a string at a time unless its contents are unchanged, returns (langKey, key count, dropped, written)."""
+    counts = {"Keys": 0, "Dropped": 0}
+    if langKey == DEFAULTLANGUAGE:
         outPath = "{}i18n/default.json".format(dstDir)
-        outData = pyjson5.dumps(langData)
-        with open(outPath, 'w') as f:
+    else:
+        outPath = "{}i18n/{}.json".format(dstDir, langKey)
+
+    def strings():
+        for k, v in langData.items():
+            # Content Patcher falls back to default.json, so a copy of the English text is dead weight
+            if langKey != DEFAULTLANGUAGE and default.get(k) == v:
+                counts["Dropped"] += 1
+                continue
+            counts["Keys"] += 1
+            yield k, v
+
+    digest = hashlib.sha1()
+    tmpPath = "{}.tmp".format(outPath)
+    with open(tmpPath, 'wb', buffering=WRITEBUFFER) as f:
+        for text in streamStrings(strings(), JSONINDENT):
+            outData = text.encode("utf-8")
+            digest.update(outData)
             f.write(outData)
-    print("i18n data written to {}".format("{}i18n".format(dstDir)))
+        size = f.tell()
+    try:
+        if os.path.getsize(outPath) == size:
+            with open(outPath, "rb") as f:
+                if hashlib.sha1(f.read()).digest() == digest.digest():
+                    os.remove(tmpPath)
+                    return langKey, counts["Keys"], counts["Dropped"], False
+    except OSError:
+        pass
+    os.replace(tmpPath, outPath)
+    if PROFILER is not None:
+        PROFILER.count("BytesWritten", size)
+    return langKey, counts["Keys"], counts["Dropped"], True
+
+
+def writePatches(results, dstDir):
+    """Writes the patches of every (stage, result) as one data/<MERGEDNAME>.json, merging EditData patches on the same target."""
+    changes = [patch for stage, result in results for patch in result["Changes"]]
+    if MERGEGIFTS:
+        changes += consolidateGiftTastes([patch for stage, result in results for patch in result["Gifts"]])
+    writeData([], consolidatePatches(changes), dstDir, MERGEDNAME, defer=False)
+
+
+STAGES = {"crops": runCrops,
+          "trees": runTrees,
+          "weapons": runWeapons,
+          "artisan": runArtisan}
 
 
 if __name__ == "__main__":
@@ -685,7 +2367,27 @@ if __name__ == "__main__":
     parser.add_argument("--m", dest="convertMethod", type=str, help="Selects Method, options: artisan, crops, trees, weapons, aio")
     parser.add_argument("--s", dest="sourceDirectory", type=str, help="Source Directory, e.g. [JA] Your Json Assets Mod")
     parser.add_argument("--d", dest="destDirectory", type=str, help="Destination Directory")
+    parser.add_argument("--rebuild", dest="rebuild", action="store_true", help="Ignore the manifest from the last run and convert everything")
+    parser.add_argument("--jobs", dest="jobs", type=int, default=os.cpu_count() or 1, help="Worker processes used to decode json files, 1 disables the pool")
+    parser.add_argument("--read-ahead", dest="readAhead", type=int, default=READAHEAD, help="Json & png files read ahead of the converter at once, hides slow or network storage, 0 reads serially")
+    parser.add_argument("--no-sprite-cache", dest="spriteCache", action="store_false", help="Decode every sprite png instead of reusing cached pixels from earlier runs")
+    parser.add_argument("--dedupe-sprites", dest="dedupe", action="store_true", help="Give identical sprites a single shared tile")
+    parser.add_argument("--png-profile", dest="pngProfile", choices=sorted(PNGPROFILES), default="default", help="Spritesheet encoding: fast for quick iteration, release for the smallest files")
+    parser.add_argument("--compact-json", dest="compactJson", action="store_true", help="Write data json without indentation, for release builds")
+    parser.add_argument("--profile", dest="profilePath", nargs="?", const="profile.json", help="Write a per-stage timing & I/O report to this json file (default profile.json)")
+    parser.add_argument("--concurrent", dest="concurrent", action="store_true", help="aio only, runs the crops, trees, weapons & artisan stages in parallel")
+    parser.add_argument("--merge-gifts", dest="mergeGifts", action="store_true", help="Write all gift tastes to data/gifttastes.json, one patch per HasMod condition & one Append per NPC and tier")
+    parser.add_argument("--merge-patches", dest="mergePatches", action="store_true", help="Write every stage's patches to data/{}.json, merging EditData patches with the same Target & When".format(MERGEDNAME))
+    parser.add_argument("--watch", dest="watch", action="store_true", help="Stay running & reconvert items as their json or png files change")
+    parser.add_argument("--max-texture-size", dest="maxTexture", type=textureSize, help="Split spritesheets into numbered pages no bigger than WIDTHxHEIGHT (or one size for both), e.g. 4096")
+    parser.add_argument("--stream", dest="stream", action="store_true", help="For very large packs, spool entries, i18n & sprites to disk as items convert so memory stays flat")
+    parser.add_argument("--batch", dest="batchPatterns", nargs="+", help="JA mod folders or globs to convert in one run, each into --d/[CP] <Name>/ with its UniqueID as the item prefix")
     args = parser.parse_args()
+    if args.watch and args.batchPatterns:
+        parser.error("--watch converts a single mod, it can't be combined with --batch")
+    if args.stream and (args.dedupe or args.mergePatches or args.watch or args.maxTexture):
+        parser.error("--stream writes each item once, it can't be combined with --dedupe-sprites, --merge-patches, --watch or --max-texture-size")
+    applyOptions(vars(args))
     outData = {"Format": "1.30.0",
                "Changes": []}
     dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -694,100 +2396,79 @@ if __name__ == "__main__":
     srcDir = "{}[JA] Raffadax Crops/".format(oldFiles)
     dstDir = "{}/1.6 Files/".format(rootDir)
     spriteDir = "{}assets/textures/".format(dstDir)
-    i18n = {"en": {}}
     modId = "{{ModId}}"
-    if not os.path.exists(spriteDir):
-        os.mkdir(spriteDir)
     if args.sourceDirectory:
         srcDir = args.sourceDirectory
     if args.destDirectory:
         dstDir = args.destDirectory
-    if args.convertMethod.lower() == "crops":
+    vanillaIndex = loadVanillaIndex("vanillaObjects.json")
+    MANIFEST.open(dstDir, "vanillaObjects.json", args.rebuild)
+    stageRuns = []  # [stage, srcDir, dstName, result] of each stage converted, re-run by --watch
+    if not args.batchPatterns:
+        # --batch creates each pack's folders under --d itself
+        os.makedirs(spriteDir, exist_ok=True)
+    if args.batchPatterns:
+        # --m picks one stage for every mod, otherwise each mod's folders decide
+        runBatch(batchMods(args.batchPatterns), dstDir.rstrip("/") + "/", vanillaIndex, vars(args), args.convertMethod)
+    elif args.convertMethod.lower() == "crops":
         srcDir = "{}[JA] Raffadax Crops/".format(oldFiles)
-        # crop objects
-        objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(srcDir, modId, "cropobjects", "Crops", i18n)
-        # seed objects and cropdata
-        objectData, cropData, cropSprites, objectSprites, i18n, cropTexture = buildCrops(srcDir, modId, objectData, objectSprites, i18n, "cropobjects")
-        # write data to file
-        writeData([objTexture, cropTexture], [objectData, cropData, giftData], dstDir, "Crops", conditionalGifts)
+        result = runCrops(srcDir, dstDir, spriteDir, modId, vanillaIndex, "Crops")
+        stageRuns = [["crops", srcDir, "Crops", result]]
         # # write i18n data
-        writeLanguageData(i18n, dstDir, "Crops")
-        # # make sprites
-        buildSprites(objectSprites, spriteDir, "cropobjects", "objects")
-        buildSprites(cropSprites, spriteDir, "crops", "crops")
+        writeLanguageData(result["i18n"], dstDir)
         print("Sprites saved to {}".format(spriteDir))
-    if args.convertMethod.lower() == "trees":
+    elif args.convertMethod.lower() == "trees":
         srcDir = "{}[JA] Raffadax Trees/".format(oldFiles)
-        # fruit objects
-        objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(srcDir, modId, "treeobjects", "FruitTrees", i18n)
-        objectData, treeData, treeSprites, objectSprites, i18n, treeTexture = buildTrees(srcDir, modId, objectData, objectSprites, i18n, "treeobjects")
-        # pprint.pprint(giftData)
-        writeData([objTexture, treeTexture], [objectData, treeData, giftData], dstDir, "Trees", conditionalGifts)
-        writeLanguageData(i18n, dstDir, "Trees")
-        buildSprites(objectSprites, spriteDir, "treeobjects", "objects")
-        buildSprites(treeSprites, spriteDir, "fruittrees", "fruittrees")
+        result = runTrees(srcDir, dstDir, spriteDir, modId, vanillaIndex, "Trees")
+        stageRuns = [["trees", srcDir, "Trees", result]]
+        writeLanguageData(result["i18n"], dstDir)
         print("Sprites saved to {}".format(spriteDir))
-    if args.convertMethod.lower() == "weapons":
+    elif args.convertMethod.lower() == "weapons":
         srcDir = "{}[JA] Raffadax Weapons/".format(oldFiles)
-        weaponData, weaponSprites, i18n, weaponTexture = buildWeapons(srcDir, modId, "weaponobjects", i18n)
-        writeData([weaponTexture], [weaponData], dstDir, "Weapons")
-        writeLanguageData(i18n, dstDir, "Weapons")
-        buildSprites(weaponSprites, spriteDir, "weaponobjects", "weapons")
+        result = runWeapons(srcDir, dstDir, spriteDir, modId, vanillaIndex, "Weapons")
+        stageRuns = [["weapons", srcDir, "Weapons", result]]
+        writeLanguageData(result["i18n"], dstDir)
         print("Sprites saved to {}".format(spriteDir))
-    if args.convertMethod.lower() == "artisan":
+    elif args.convertMethod.lower() == "artisan":
         srcDir = "{}Raffadax Artisan Assets/[JA] Raffadax Production/".format(oldFiles)
-        objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(srcDir, modId, "artisanobjects", "Artisan")
-        bigObjectData, bigObjectSprites, i18n, bigObjTexture = buildBigObjects(srcDir, modId, "artisanmachines", "Artisan", i18n)
-        # recipes
-        vanillaObjects = pyjson5.load(open("vanillaObjects.json"), encoding="utf-8")
-        cookingData = buildCooking(srcDir, modId, vanillaObjects)
-        craftingData = buildCrafting(srcDir, modId, vanillaObjects)
-        writeData([objTexture, bigObjTexture], [objectData, bigObjectData, cookingData, craftingData], dstDir, "Artisan", conditionalGifts)
-        writeLanguageData(i18n, dstDir, "Artisan")
-        print("Building sprites...")
-        buildSprites(objectSprites, spriteDir, "artisanobjects", "objects")
-        buildSprites(bigObjectSprites, spriteDir, "artisanmachines", "bigobjects")
+        result = runArtisan(srcDir, dstDir, spriteDir, modId, vanillaIndex, "Artisan")
+        stageRuns = [["artisan", srcDir, "Artisan", result]]
+        writeLanguageData(result["i18n"], dstDir)
         print("Sprites saved to {}".format(spriteDir))
-    if args.convertMethod.lower() == "aio":
-        cropDir = "{}[JA] Raffadax Crops/".format(oldFiles)
-        treeDir = "{}[JA] Raffadax Trees/".format(oldFiles)
-        wepDir = "{}[JA] Raffadax Weapons/".format(oldFiles)
-        artiDir = "{}Raffadax Artisan Assets/[JA] Raffadax Production/".format(oldFiles)
+    elif args.convertMethod.lower() == "aio":
+        stageDirs = [("crops", "{}[JA] Raffadax Crops/".format(oldFiles)),
+                     ("trees", "{}[JA] Raffadax Trees/".format(oldFiles)),
+                     ("weapons", "{}[JA] Raffadax Weapons/".format(oldFiles)),
+                     ("artisan", "{}Raffadax Artisan Assets/[JA] Raffadax Production/".format(oldFiles))]
         dstDir = "{}/1.6 Files/[CP] Raffadax Test/assets/".format(rootDir)
         spriteDir = "{}textures/".format(dstDir)
-        i18n = {"en": {}}
-        vanillaObjects = pyjson5.load(open("vanillaObjects.json"), encoding="utf-8")
-        # Crops
-        print("Generating Crop Data")
-        objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(cropDir, modId, "cropobjects", "Crops", i18n)
-        # seed objects and cropdata
-        objectData, cropData, cropSprites, objectSprites, i18n, cropTexture = buildCrops(cropDir, modId, objectData, objectSprites, i18n, "cropobjects", vanillaObjects)
-        # write data to file
-        writeData([objTexture, cropTexture], [objectData, cropData, giftData], dstDir, "crops", conditionalGifts)
-        # # make sprites
-        buildSprites(objectSprites, spriteDir, "cropobjects", "objects")
-        buildSprites(cropSprites, spriteDir, "crops", "crops")
-        # Trees
-        print("Generating Fruit Tree Data")
-        objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(treeDir, modId, "treeobjects", "FruitTrees", i18n)
-        objectData, treeData, treeSprites, objectSprites, i18n, treeTexture = buildTrees(treeDir, modId, objectData, objectSprites, i18n, "treeobjects")
-        writeData([objTexture, treeTexture], [objectData, treeData, giftData], dstDir, "trees", conditionalGifts)
-        buildSprites(objectSprites, spriteDir, "treeobjects", "objects")
-        buildSprites(treeSprites, spriteDir, "fruittrees", "fruittrees")
-        # weapons
-        print("Generating Weapon Data")
-        weaponData, weaponSprites, i18n, weaponTexture = buildWeapons(wepDir, modId, "weaponobjects", i18n)
-        writeData([weaponTexture], [weaponData], dstDir, "weapons")
-        buildSprites(weaponSprites, spriteDir, "weaponobjects", "weapons")
-        # artisan
-        print("Generating Artisan Data")
-        objectData, objectSprites, giftData, i18n, objTexture, conditionalGifts = buildObjects(artiDir, modId, "artisanobjects", "Artisan", i18n)
-        bigObjectData, bigObjectSprites, i18n, bigObjTexture = buildBigObjects(artiDir, modId, "artisanmachines", "Artisan", i18n)
-        # recipes
-        cookingData = buildCooking(artiDir, modId, vanillaObjects)
-        craftingData = buildCrafting(artiDir, modId, vanillaObjects)
-        writeData([objTexture, bigObjTexture], [objectData, bigObjectData, cookingData, craftingData], dstDir, "artisan", conditionalGifts)
-        buildSprites(objectSprites, spriteDir, "artisanobjects", "objects")
-        buildSprites(bigObjectSprites, spriteDir, "artisanmachines", "bigobjects")
+        os.makedirs(spriteDir, exist_ok=True)
+        MANIFEST.open(dstDir, "vanillaObjects.json", args.rebuild)
+        if args.concurrent:
+            stageOptions = dict(vars(args), jobs=max(1, args.jobs // len(stageDirs)))
+            with ProcessPoolExecutor(max_workers=len(stageDirs)) as pool:
+                futures = [(stage, pool.submit(runStage, stage, stageDir, dstDir, spriteDir, modId, vanillaIndex, stageOptions)) for stage, stageDir in stageDirs]
+                results = [(stage, future.result()) for stage, future in futures]
+        else:
+            results = [(stage, STAGES[stage](stageDir, dstDir, spriteDir, modId, vanillaIndex)) for stage, stageDir in stageDirs]
+        i18n = mergeStageResults(results)
         # # write i18n data
         writeLanguageData(i18n, dstDir)
+        # only the i18n & keys are kept, worker manifest changes are already merged
+        stageRuns = [[stage, stageDir, stage, {"i18n": result["i18n"], "Keys": result["Keys"], "Gifts": result["Gifts"], "Changes": result["Changes"]}] for (stage, stageDir), (_, result) in zip(stageDirs, results)]
+    if args.mergeGifts and stageRuns:
+        writeGiftTastes([(stageRun[0], stageRun[3]) for stageRun in stageRuns], dstDir)
+    if args.mergePatches and stageRuns:
+        writePatches([(stageRun[0], stageRun[3]) for stageRun in stageRuns], dstDir)
+    if args.watch and stageRuns:
+        MANIFEST.save()
+        runWatch(stageRuns, dstDir, spriteDir, modId, vanillaIndex)
+    MANIFEST.save()
+    SPRITECACHE.save()
+    JSONLOADER.save()
+    DOCS.report()
+    JSONLOADER.report()
+    MANIFEST.report()
+    SPRITECACHE.report()
+    if PROFILER is not None:
+        PROFILER.write(args.profilePath)
@@ -7,16 +7,19 @@ import json
 import os
 import pprint
 
-import pyjson5
+from jsonloader import JsonLoader
+from vanillaindex import loadVanillaIndex
 
 MODNAME = "Raffadax.RaffadaxCompleteProduction"
 MYCFILE = "H:/Stardew Raffadax Update/Raffadax-Complete-Production/1.5.6 Files/[MYC] Raffadax Multi Yield/HarvestRules.json"
 OUTPATH = "H:/Stardew Raffadax Update/Raffadax-Complete-Production/1.6 Files/[MYC] Raffadax Multi Yield/HarvestRules.json"
 
 if __name__ == "__main__":
-    mycData = pyjson5.load(open(MYCFILE), encoding="utf-8")
+    loader = JsonLoader()
+    mycData = loader.load(MYCFILE)
+    loader.save()
     vanillaFile = "vanillaObjects.json"
-    vanillaData = json.load(open(vanillaFile))
+    vanillaData = loadVanillaIndex(vanillaFile)
     outList = []
     for rule in mycData["Harvests"]:
         outRule = copy.deepcopy(rule)
@@ -0,0 +1,124 @@
+"""Adaptive json loading: strict json first, pyjson5 only for files that use JSON5 features.
+
+Most JA files & the generated vanillaObjects.json are strict json, which the stdlib decoder reads
+faster. Files that needed pyjson5 are remembered with their size & mtime in DECODERFILE, so later
+runs skip the failed strict attempt until the file changes.
+"""
+import json
+import os
+import threading
+
+import pyjson5
+
+DECODERFILE = os.path.join(os.path.expanduser("~"), ".ja2cp", "decoders.json")
+
+
+class JsonLoader():
+    """Loads json files through the fastest decoder that works for each, counting fast path hits."""
+
+    def __init__(self, cacheFile=DECODERFILE):
+        self.cacheFile = cacheFile
+        self.records = None  # {path: [size, mtime_ns]} of files that need pyjson5, read on first use
+        self.updates = {}  # records learned this run, None drops a file that is strict json again
+        self.counts = {"Strict": 0, "Json5": 0, "Known": 0}
+        self.lock = threading.Lock()
+
+    def changes(self):
+        """Returns & clears what this process learned, for merging back from a worker process."""
+        with self.lock:
+            changes = {"Updates": self.updates, "Counts": self.counts}
+            self.updates = {}
+            self.counts = dict.fromkeys(self.counts, 0)
+        return changes
+
+    def count(self, kind):
+        """Adds one file to a decoder's count."""
+        with self.lock:
+            self.counts[kind] += 1
+
+    def decode(self, path, raw, stamp):
+        """Parses json bytes read from path at stamp [size, mtime_ns], trying strict json unless it is known to need pyjson5."""
+        text = raw.decode("utf-8-sig")
+        if self.isJson5(path, stamp):
+            self.count("Known")
+            return pyjson5.loads(text)
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = pyjson5.loads(text)  # a real syntax error raises from here
+            self.count("Json5")
+            self.remember(path, stamp)
+            return data
+        self.count("Strict")
+        with self.lock:
+            if self.records and self.key(path) in self.records:
+                self.updates[self.key(path)] = None
+        return data
+
+    def isJson5(self, path, stamp):
+        """True if path needed pyjson5 when it last had this [size, mtime_ns]."""
+        key = self.key(path)
+        with self.lock:
+            if self.records is None:
+                self.records = self.readRecords()
+            if key in self.updates:
+                return self.updates[key] == stamp
+            return self.records.get(key) == stamp
+
+    def key(self, path):
+        """Normalizes a path so every spelling of a file shares one record."""
+        return os.path.normcase(os.path.abspath(path)).replace("\\", "/")
+
+    def load(self, path):
+        """Parses the json file at path."""
+        with open(path, "rb") as f:
+            raw = f.read()
+            stat = os.fstat(f.fileno())
+        return self.decode(path, raw, [stat.st_size, stat.st_mtime_ns])
+
+    def merge(self, changes):
+        """Folds a worker's changes() into this loader."""
+        with self.lock:
+            self.updates.update(changes["Updates"])
+            for kind, n in changes["Counts"].items():
+                self.counts[kind] += n
+
+    def readRecords(self):
+        """Returns the saved pyjson5 records, or none if there are no readable ones."""
+        try:
+            with open(self.cacheFile, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def remember(self, path, stamp):
+        """Records that path needs pyjson5 at this size & mtime."""
+        with self.lock:
+            self.updates[self.key(path)] = stamp
+
+    def report(self):
+        """Prints the strict json fast path hit rate."""
+        total = sum(self.counts.values())
+        if total:
+            print("Strict json fast path: {} of {} files ({:.0%}), {} needed pyjson5, {} known to".format(
+                self.counts["Strict"], total, self.counts["Strict"] / total, self.counts["Json5"], self.counts["Known"]))
+
+    def save(self):
+        """Writes the records learned this run, merged with any saved meanwhile."""
+        with self.lock:
+            if not self.updates:
+                return
+            records = self.readRecords()
+            for key, stamp in self.updates.items():
+                if stamp is None:
+                    records.pop(key, None)
+                else:
+                    records[key] = stamp
+            os.makedirs(os.path.dirname(self.cacheFile), exist_ok=True)
+            # worker processes save concurrently, each through its own temp file
+            tmpPath = "{}.{}.tmp".format(self.cacheFile, os.getpid())
+            with open(tmpPath, 'w', encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(tmpPath, self.cacheFile)
+            self.records = records
+            self.updates = {}
@@ -0,0 +1,85 @@
+"""Overlapped file ingestion: files are read ahead of their consumer on an asyncio loop & parsed on an executor.
+
+Results come back in input order through a bounded queue, so slow or cold storage is read while earlier files
+are still being parsed & converted, and at most limit files are held between reading & consumption.
+"""
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+READTHREADS = 8  # blocking reads in flight at once, asyncio has no portable async file I/O
+QUEUEPOLL = 0.05  # seconds a blocked put waits before checking whether the consumer went away
+
+
+def readFile(path):
+    """Returns a file's bytes & its [size, mtime_ns]."""
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        return f.read(), [stat.st_size, stat.st_mtime_ns]
+
+
+class ReadAhead():
+    """Iterates (path, parse(path, read(path))) in input order while later files are read & parsed in the background.
+
+    A read or parse error is raised when iteration reaches its file. Leaving the loop early stops the reader.
+    """
+
+    def __init__(self, paths, parse, read=readFile, limit=16, parseExecutor=None):
+        self.paths = list(paths)
+        self.parse = parse
+        self.read = read
+        self.limit = max(1, limit)
+        self.parseExecutor = parseExecutor  # None parses on the loop's default thread pool
+        self.results = queue.Queue(maxsize=self.limit)
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self.thread.start()
+
+    def __iter__(self):
+        try:
+            for path in self.paths:
+                result, error = self.results.get()
+                if error is not None:
+                    raise error
+                yield path, result
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops reading ahead & waits for the reader, results not taken yet are dropped."""
+        self.closed.set()
+        self.thread.join()
+
+    async def fetch(self, loop, limiter, readPool, path):
+        """Reads then parses one file, the limiter slot is released once its result is queued."""
+        await limiter.acquire()
+        if self.closed.is_set():
+            return None, None
+        try:
+            raw = await loop.run_in_executor(readPool, self.read, path)
+            return await loop.run_in_executor(self.parseExecutor, self.parse, path, raw), None
+        except Exception as e:
+            return None, e
+
+    def put(self, item):
+        """Queues a result, blocking while the queue is full unless the consumer has gone away."""
+        while not self.closed.is_set():
+            try:
+                self.results.put(item, timeout=QUEUEPOLL)
+                return
+            except queue.Full:
+                pass
+
+    async def run(self):
+        """Issues every read up to limit ahead & queues the results in input order."""
+        loop = asyncio.get_running_loop()
+        limiter = asyncio.Semaphore(self.limit)
+        with ThreadPoolExecutor(max_workers=min(READTHREADS, self.limit)) as readPool:
+            tasks = [asyncio.ensure_future(self.fetch(loop, limiter, readPool, path)) for path in self.paths]
+            for task in tasks:
+                item = await task
+                # a full queue blocks this put, which holds back the reads waiting on the limiter
+                await loop.run_in_executor(None, self.put, item)
+                limiter.release()
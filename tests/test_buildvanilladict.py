@@ -0,0 +1,36 @@
+import json
+import random
+
+import pytest
+
+from buildVanillaDict import iterEntries
+
+
+def randomValue(rng, depth=0):
+    kind = rng.choice(["int", "float", "exp", "str", "literal", "list", "dict"] if depth < 3 else ["int", "float", "exp", "str", "literal"])
+    if kind == "int":
+        return rng.randint(-10 ** rng.randint(0, 12), 10 ** rng.randint(0, 12))
+    if kind == "float":
+        return round(rng.uniform(-1000, 1000), rng.randint(1, 6))
+    if kind == "exp":
+        return rng.uniform(-1, 1) * 10 ** rng.randint(-30, 30)
+    if kind == "str":
+        return "".join(rng.choice('ab c"\\é\n☃{}[],:') for n in range(rng.randint(0, 12)))
+    if kind == "literal":
+        return rng.choice([True, False, None])
+    if kind == "list":
+        return [randomValue(rng, depth + 1) for n in range(rng.randint(0, 4))]
+    return {"k{}".format(n): randomValue(rng, depth + 1) for n in range(rng.randint(0, 4))}
+
+
+@pytest.mark.parametrize("chunkSize", [1, 2, 3, 5, 9, 64])
+def test_iter_entries_matches_json_load(tmp_path, chunkSize):
+    rng = random.Random(chunkSize)
+    path = tmp_path / "asset.json"
+    for n in range(300):
+        doc = {"{}".format(i): randomValue(rng) for i in range(rng.randint(0, 8))}
+        text = json.dumps(doc, indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5)
+        path.write_text(text, encoding="utf-8")
+        with open(path, encoding="utf-8") as f:
+            expected = list(json.load(f).items())
+        assert list(iterEntries(str(path), chunkSize)) == expected, text
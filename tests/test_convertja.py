@@ -0,0 +1,202 @@
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from PIL import Image
+
+import benchmark
+import convertja
+from vanillaindex import loadVanillaIndex
+
+REPODIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def plain(monkeypatch):
+    """Applies the benchmark's plain options for one test & restores the run-wide globals after it."""
+    for name in ["DEDUPESPRITES", "JSONINDENT", "MAXTEXTURE", "MERGEGIFTS", "MERGEPATCHES", "PNGPROFILE", "PROFILER", "READAHEAD", "STREAMING", "DOCS", "MANIFEST"]:
+        monkeypatch.setattr(convertja, name, getattr(convertja, name))
+    monkeypatch.setattr(convertja.SPRITECACHE, "enabled", convertja.SPRITECACHE.enabled)
+    # the stages open the manifest against vanillaObjects.json in the working directory
+    monkeypatch.chdir(REPODIR)
+    convertja.DOCS = convertja.DocumentStore()
+    convertja.MANIFEST = convertja.Manifest()
+    convertja.applyOptions(benchmark.PLAINOPTIONS)
+    return benchmark.PLAINOPTIONS
+
+
+def test_json_decode_error_pickles(tmp_path):
+    error = convertja.JsonDecodeError(str(tmp_path / "bad.json"), ValueError("trailing garbage"))
+    restored = pickle.loads(pickle.dumps(error))
+    assert restored.path == error.path
+    assert str(restored) == str(error)
+
+
+def test_json_decode_error_from_pool_worker(tmp_path):
+    good = tmp_path / "good.json"
+    good.write_text('{"Name": "Good"}')
+    bad = tmp_path / "bad.json"
+    bad.write_text('{"Name": ')
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(convertja.decodeChunk, [str(good), str(bad)])
+        with pytest.raises(convertja.JsonDecodeError) as caught:
+            future.result()
+    assert caught.value.path == str(bad)
+    assert str(bad) in str(caught.value)
+
+
+def test_write_stage_times_write_data(tmp_path, monkeypatch):
+    profiler = convertja.Profiler()
+    monkeypatch.setattr(convertja, "PROFILER", profiler)
+    convertja.unmergedGifts([])
+    assert profiler.stages == {}
+    convertja.writeData([], [], "{}/".format(tmp_path), "empty", defer=False)
+    assert profiler.stages["write"]["Calls"] == 1
+
+
+def test_build_sprites_is_timed_per_sheet(tmp_path, monkeypatch):
+    profiler = convertja.Profiler()
+    monkeypatch.setattr(convertja, "PROFILER", profiler)
+    monkeypatch.setattr(convertja.SPRITECACHE, "enabled", False)
+    sprite = tmp_path / "sprite.png"
+    Image.new("RGBA", (16, 16), (255, 0, 0, 255)).save(sprite)
+    pages = [[{str(sprite): 0}, "first", "objects"], [{str(sprite): 0}, "second", "objects"]]
+    convertja.buildPages(pages, "{}/".format(tmp_path))
+    assert profiler.calls["buildSprites"]["Calls"] == 2
+    assert "buildPages" not in profiler.calls
+
+
+def test_localizations_are_written_per_language(tmp_path):
+    objData = {"Name": "Foo Machine", "Description": "Makes foo", "Price": 5,
+               "NameLocalization": {"de": "Foomaschine", "fr": "Machine à foo"},
+               "DescriptionLocalization": {"de": "Macht Foo"}}
+    i18n = convertja.convertBigObject(objData, "Test.Mod", "Artisan", 0)["i18n"]
+    assert sorted(i18n) == ["de", "en", "fr"]
+    # translations share the English keys the entry's DisplayName & Description point at
+    assert set(i18n["de"]) == set(i18n["en"])
+    convertja.writeLanguageData(i18n, "{}/".format(tmp_path))
+    assert sorted(p.name for p in (tmp_path / "i18n").iterdir()) == ["de.json", "default.json", "fr.json"]
+    assert json.loads((tmp_path / "i18n" / "de.json").read_text(encoding="utf-8")) == {
+        "FooMachine.DisplayName": "Foomaschine", "FooMachine.Description": "Macht Foo"}
+
+
+def test_dedupe_keeps_entries_without_sprites_blank(tmp_path, monkeypatch):
+    monkeypatch.setattr(convertja.SPRITECACHE, "enabled", False)
+    colors = {"red": (255, 0, 0, 255), "green": (0, 255, 0, 255), "blue": (0, 0, 255, 255)}
+    paths = {}
+    for name, color in [("a", "red"), ("b", "green"), ("d", "blue"), ("e", "red")]:
+        paths[name] = str(tmp_path / "{}.png".format(name))
+        Image.new("RGBA", (16, 16), colors[color]).save(paths[name])
+    # item c's sprite is missing, its tile was left blank
+    spriteList = {paths["a"]: 0, paths["b"]: 1, paths["d"]: 3, paths["e"]: 4}
+    patch = {"Entries": {name: {"SpriteIndex": n} for n, name in enumerate("abcde")}}
+    expected = {"a": colors["red"], "b": colors["green"], "c": (0, 0, 0, 0), "d": colors["blue"], "e": colors["red"]}
+    newList = convertja.dedupeSprites(spriteList, patch, "objects")
+    convertja.buildSprites(newList, "{}/".format(tmp_path), "sheet", "objects")
+    with Image.open(tmp_path / "sheet.png") as sheet:
+        sheet = sheet.convert("RGBA")
+        for name, entry in patch["Entries"].items():
+            x, y = convertja.tilePosition("objects", entry["SpriteIndex"])
+            assert sheet.getpixel((x + 8, y + 8)) == expected[name], name
+    assert len({entry["SpriteIndex"] for entry in patch["Entries"].values()}) == 4
+
+
+@pytest.mark.parametrize("readAhead", [0, 4])
+def test_document_store_counts_reuse_as_hits(tmp_path, monkeypatch, readAhead):
+    monkeypatch.setattr(convertja, "READAHEAD", readAhead)
+    paths = []
+    for n in range(3):
+        path = tmp_path / "{}.json".format(n)
+        path.write_text('{{"Name": "Item {}"}}'.format(n))
+        paths.append(str(path))
+    docs = convertja.DocumentStore()
+    docs.preload(paths)
+    for path in paths:
+        docs.load(path)
+    assert (docs.misses, docs.hits) == (3, 0)
+    docs.preload(paths)
+    assert docs.load(paths[0]) == {"Name": "Item 0"}
+    assert (docs.misses, docs.hits) == (3, 1)
+
+
+def test_manifest_reuses_unchanged_conversions(tmp_path, monkeypatch):
+    source = tmp_path / "item.json"
+    source.write_text('{"Name": "Foo"}')
+    vanilla = tmp_path / "vanilla.json"
+    vanilla.write_text("{}")
+    calls = []
+
+    def convert(data, suffix):
+        calls.append(data["Name"])
+        return {"Entries": {data["Name"] + suffix: {}}}
+
+    def run(context=("x",), rebuild=False):
+        monkeypatch.setattr(convertja, "DOCS", convertja.DocumentStore())
+        monkeypatch.setattr(convertja, "MANIFEST", convertja.Manifest())
+        convertja.MANIFEST.open("{}/".format(tmp_path), str(vanilla), rebuild)
+        result = convertja.convertCached("objects", str(source), list(context), convert, *context)
+        convertja.MANIFEST.save()
+        return result
+
+    assert run() == {"Entries": {"Foox": {}}}
+    assert run() == {"Entries": {"Foox": {}}}
+    assert calls == ["Foo"]
+    assert convertja.MANIFEST.reused == 1
+    # another context, changed contents, --rebuild & a new converter version each convert again
+    assert run(("y",)) == {"Entries": {"Fooy": {}}}
+    source.write_text('{"Name": "Bar"}')
+    assert run() == {"Entries": {"Barx": {}}}
+    run(rebuild=True)
+    monkeypatch.setattr(convertja, "CONVERTERVERSION", "test")
+    run()
+    assert calls == ["Foo", "Foo", "Bar", "Bar", "Bar"]
+    run()
+    assert calls == ["Foo", "Foo", "Bar", "Bar", "Bar"]
+
+
+def test_concurrent_stages_match_serial(tmp_path, plain):
+    srcDir = "{}/pack/".format(tmp_path)
+    benchmark.makePack(srcDir, 4)
+    vanillaIndex = loadVanillaIndex("vanillaObjects.json")
+    outDirs = {}
+    for mode in ["serial", "concurrent"]:
+        dstDir = "{}/{}/".format(tmp_path, mode)
+        spriteDir = "{}textures/".format(dstDir)
+        os.makedirs(spriteDir)
+        if mode == "serial":
+            results = [(stage, run(srcDir, dstDir, spriteDir, "{{ModId}}", vanillaIndex)) for stage, run in convertja.STAGES.items()]
+        else:
+            with ProcessPoolExecutor(max_workers=len(convertja.STAGES)) as pool:
+                futures = [(stage, pool.submit(convertja.runStage, stage, srcDir, dstDir, spriteDir, "{{ModId}}", vanillaIndex, plain)) for stage in convertja.STAGES]
+                results = [(stage, future.result()) for stage, future in futures]
+        convertja.writeLanguageData(convertja.mergeStageResults(results), dstDir)
+        outDirs[mode] = dstDir
+    assert len(benchmark.snapshotOutput(outDirs["serial"])) > 10
+    assert benchmark.compareOutput(outDirs["serial"], outDirs["concurrent"]) == []
+
+
+def test_sprite_cache_hits_and_invalidates(tmp_path):
+    sprite = tmp_path / "sprite.png"
+    Image.new("RGBA", (16, 16), (255, 0, 0, 255)).save(sprite)
+    cacheDir = str(tmp_path / "cache")
+    first = convertja.SpriteCache(cacheDir)
+    assert first.load(str(sprite)).getpixel((0, 0)) == (255, 0, 0, 255)
+    first.save()
+    second = convertja.SpriteCache(cacheDir)
+    assert second.has(str(sprite))
+    assert second.load(str(sprite)).getpixel((0, 0)) == (255, 0, 0, 255)
+    assert (second.hits, second.misses) == (1, 0)
+    # an edited sprite has another size or mtime, its stale entry is never read
+    Image.new("RGBA", (16, 16), (0, 0, 255, 255)).save(sprite)
+    stat = os.stat(sprite)
+    os.utime(sprite, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert not second.has(str(sprite))
+    assert second.load(str(sprite)).getpixel((0, 0)) == (0, 0, 255, 255)
+    assert (second.hits, second.misses) == (1, 1)
+    # over maxBytes the least recently used sprite is evicted
+    second.maxBytes = 16 * 16 * 4
+    second.save()
+    assert len(convertja.SpriteCache(cacheDir).readIndex()) == 1
+    assert len([name for name in os.listdir(cacheDir) if name.endswith(".rgba")]) == 1
@@ -0,0 +1,95 @@
+"""Compiled lookup index over the vanilla item data made by buildVanillaDict.py.
+
+The json source is compiled once into a pickle beside it, stamped with the
+source's size & mtime so a rebuilt vanillaObjects.json is picked up.
+"""
+import os
+import pickle
+import re
+
+from jsonloader import JsonLoader
+
+DATAVERSION = 2  # versioned vanillaObjects.json written by buildVanillaDict.py, the flat Objects-only dict is 1
+INDEXVERSION = 2  # bump when the compiled layout changes
+KINDS = ["Objects", "BigCraftables", "Weapons", "Crops", "FruitTrees"]
+NAMERE = r"[^a-zA-Z0-9_\.]"  # strips invalid chars from item IDs
+
+
+class VanillaIndex():
+    """Name to ID tables per item kind, keyed by exact, NAMERE-stripped & case-folded names."""
+
+    def __init__(self, tables):
+        self.categories = tables.get("Categories", {})
+        self.giftTastes = tables.get("GiftTastes", {})
+        self.exact = {}
+        self.normalized = {}
+        self.folded = {}
+        for kind in KINDS:
+            self.exact[kind] = {}
+            self.normalized[kind] = {}
+            self.folded[kind] = {}
+            for name, itemId in tables.get(kind, {}).items():
+                self.exact[kind][name] = itemId
+                # first name wins when two vanilla names strip to the same key
+                self.normalized[kind].setdefault(normalizeName(name), itemId)
+                self.folded[kind].setdefault(foldName(name), itemId)
+
+    def __contains__(self, name):
+        return self.resolve(name) is not None
+
+    def resolve(self, name, kind="Objects"):
+        """Returns the vanilla ID for name, or None if it is not a vanilla item of that kind."""
+        if name in self.exact[kind]:
+            return self.exact[kind][name]
+        stripped = normalizeName(name)
+        if stripped in self.normalized[kind]:
+            return self.normalized[kind][stripped]
+        return self.folded[kind].get(stripped.casefold())
+
+
+def foldName(name):
+    """Case-folded, NAMERE-stripped key."""
+    return normalizeName(name).casefold()
+
+
+def loadVanillaIndex(srcPath="vanillaObjects.json"):
+    """Loads the compiled index for srcPath, compiling it first if the source changed."""
+    stat = os.stat(srcPath)
+    stamp = [INDEXVERSION, stat.st_size, stat.st_mtime_ns]
+    indexPath = "{}.index.pickle".format(os.path.splitext(srcPath)[0])
+    try:
+        with open(indexPath, "rb") as f:
+            compiled = pickle.load(f)
+        if compiled["Stamp"] == stamp:
+            return compiled["Index"]
+    except (OSError, EOFError, KeyError, pickle.UnpicklingError):
+        pass
+    loader = JsonLoader()
+    data = loader.load(srcPath)
+    loader.save()
+    index = VanillaIndex(vanillaTables(data))
+    try:
+        with open(indexPath, "wb") as f:
+            pickle.dump({"Stamp": stamp, "Index": index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # read-only checkout, compile again next run
+    return index
+
+
+def normalizeName(name):
+    """Strips characters that are invalid in item IDs, the way converted item names are built."""
+    return re.sub(NAMERE, "", str(name))
+
+
+def vanillaTables(data):
+    """Splits vanilla data into per-kind Name to ID tables, a flat dict is the older Objects-only format."""
+    if "Version" in data:
+        if data["Version"] > DATAVERSION:
+            raise ValueError("vanilla data version {} is newer than this converter supports".format(data["Version"]))
+        tables = {kind: data.get(kind, {}) for kind in KINDS}
+        tables["Categories"] = data.get("Categories", {})
+        tables["GiftTastes"] = data.get("GiftTastes", {})
+        return tables
+    if any(kind in data and isinstance(data[kind], dict) for kind in KINDS):
+        return {kind: data.get(kind, {}) for kind in KINDS}
+    return {"Objects": data}